@@ -0,0 +1,146 @@
+"""启动耗时基准测试
+
+测量两项指标：
+1. 首个窗口显示耗时：从启动 Python 进程到主窗口完成首次绘制
+2. 模块导入耗时：使用 `python -X importtime` 统计导入下载器模块的累计耗时
+
+用法:
+    python benchmark_startup.py
+    python benchmark_startup.py --runs 10 --max-window-ms 1500 --max-import-ms 300
+超过阈值时以非零状态码退出，便于发现启动性能回退；
+设置了 --max-window-ms 但没有显示环境、无法测量窗口耗时时同样以非零状态码退出。
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 子进程中运行：导入 GUI 模块、创建窗口并完成首次绘制后立即退出
+WINDOW_SNIPPET = """
+import download_yys_images_ui as ui
+root, app = ui.create_main_window()
+root.update()
+print("WINDOW_READY", flush=True)
+root.destroy()
+"""
+
+def measure_first_window():
+    """返回从启动进程到窗口首次绘制完成的毫秒数，无法创建窗口时返回 None"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", WINDOW_SNIPPET],
+        cwd=HERE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    for line in proc.stdout:
+        if line.strip() == "WINDOW_READY":
+            elapsed = (time.perf_counter() - start) * 1000
+            proc.wait()
+            return elapsed
+    proc.wait()
+    return None
+
+def parse_importtime(stderr):
+    """解析 -X importtime 输出，按输出顺序返回 [(模块名, 嵌套层数, 累计微秒)]"""
+    result = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            cumulative = int(fields[1].strip())
+        except ValueError:
+            continue
+        name = fields[2][1:]
+        depth = (len(name) - len(name.lstrip())) // 2
+        result.append((name.strip(), depth, cumulative))
+    return result
+
+def nested_imports(entries, module):
+    """返回导入 module 期间才导入的模块 [(模块名, 累计微秒)]
+
+    -X importtime 在模块导入完成时才输出该行，嵌套导入的模块排在它前面且缩进更深；
+    解释器启动时已导入的模块（site、.pth 文件引入的模块等）不计入。
+    """
+    for index, (name, depth, _) in enumerate(entries):
+        if name == module:
+            break
+    else:
+        return []
+    nested = []
+    for name, child_depth, cumulative in reversed(entries[:index]):
+        if child_depth <= depth:
+            break
+        nested.append((name, cumulative))
+    return nested
+
+def measure_import(module):
+    """返回 (模块累计导入毫秒数, 最慢的若干依赖)"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    entries = parse_importtime(proc.stderr)
+    total_us = next((cumulative for name, _, cumulative in entries if name == module), 0)
+    slowest = sorted(nested_imports(entries, module), key=lambda item: item[1], reverse=True)[:5]
+    return total_us / 1000, slowest
+
+def summarize(samples):
+    return f"中位数 {statistics.median(samples):.1f}ms | 最小 {min(samples):.1f}ms | 最大 {max(samples):.1f}ms"
+
+def main():
+    parser = argparse.ArgumentParser(description="阴阳师壁纸下载器启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的重复次数")
+    parser.add_argument("--max-window-ms", type=float, default=None, help="首个窗口耗时中位数上限")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="模块导入耗时中位数上限")
+    args = parser.parse_args()
+
+    failed = False
+
+    for module in ("download_yys_images_ui", "download_yys_images"):
+        samples = []
+        slowest = []
+        for _ in range(args.runs):
+            elapsed, slowest = measure_import(module)
+            samples.append(elapsed)
+        print(f"导入 {module}: {summarize(samples)}")
+        for name, us in slowest:
+            print(f"    {name:<30} {us/1000:.1f}ms")
+        if args.max_import_ms is not None and statistics.median(samples) > args.max_import_ms:
+            print(f"    超过阈值 {args.max_import_ms}ms")
+            failed = True
+
+    samples = []
+    for _ in range(args.runs):
+        elapsed = measure_first_window()
+        if elapsed is None:
+            break
+        samples.append(elapsed)
+    if samples:
+        print(f"首个窗口显示: {summarize(samples)}")
+        if args.max_window_ms is not None and statistics.median(samples) > args.max_window_ms:
+            print(f"    超过阈值 {args.max_window_ms}ms")
+            failed = True
+    elif args.max_window_ms is not None:
+        # 设置了阈值却无法测量时不能视为通过
+        print("首个窗口显示: 无法创建窗口（没有可用的显示环境？），无法检查 --max-window-ms 阈值")
+        failed = True
+    else:
+        print("首个窗口显示: 无法创建窗口（没有可用的显示环境？），已跳过")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""传输层基准测试：HTTP/1.1 连接池 vs HTTP/2 多路复用
+
+在本机启动两个模拟服务器（HTTP/1.1 与 HTTP/2 h2c），每个请求附加固定的服务器延迟，
+用多个线程并发调用 download_image 下载同一批图片，比较总耗时、吞吐和建立的 TCP 连接数。
+
+用法:
+    python benchmark_transport.py
+    python benchmark_transport.py --images 64 --size-kb 512 --latency-ms 30 --workers 8
+HTTP/2 部分依赖 `pip install httpx[http2]`，未安装时只测试 HTTP/1.1。
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from download_yys_images_ui import download_image
+import yys_transport
+
+class ServerStats:
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def count(self, connections=0, requests=0):
+        with self.lock:
+            self.connections += connections
+            self.requests += requests
+
+    def snapshot(self):
+        with self.lock:
+            return self.connections, self.requests
+
+def start_http1_server(payload, latency, stats):
+    """启动 HTTP/1.1 keep-alive 模拟服务器，返回端口"""
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            stats.count(connections=1)
+
+        def do_GET(self):
+            stats.count(requests=1)
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server.server_port
+
+def start_http2_server(payload, latency, stats):
+    """启动 HTTP/2（h2c，prior knowledge）模拟服务器，返回端口"""
+    import h2.config
+    import h2.connection
+    import h2.events
+    import h2.exceptions
+
+    class H2Protocol(asyncio.Protocol):
+        def __init__(self):
+            config = h2.config.H2Configuration(client_side=False, header_encoding='utf-8')
+            self.conn = h2.connection.H2Connection(config=config)
+            self.transport = None
+            self.flow_waiters = {}
+
+        def connection_made(self, transport):
+            stats.count(connections=1)
+            self.transport = transport
+            self.conn.initiate_connection()
+            self.transport.write(self.conn.data_to_send())
+
+        def data_received(self, data):
+            try:
+                events = self.conn.receive_data(data)
+            except h2.exceptions.ProtocolError:
+                self.transport.write(self.conn.data_to_send())
+                self.transport.close()
+                return
+            for event in events:
+                if isinstance(event, h2.events.RequestReceived):
+                    stats.count(requests=1)
+                    asyncio.ensure_future(self.respond(event.stream_id))
+                elif isinstance(event, h2.events.WindowUpdated):
+                    self.window_updated(event.stream_id)
+                elif isinstance(event, h2.events.StreamReset):
+                    self.window_updated(event.stream_id)
+            self.transport.write(self.conn.data_to_send())
+
+        def connection_lost(self, exc):
+            for waiter in self.flow_waiters.values():
+                if not waiter.done():
+                    waiter.cancel()
+
+        def window_updated(self, stream_id):
+            # stream_id 为 0 表示连接级窗口，唤醒所有等待的流
+            targets = list(self.flow_waiters) if stream_id == 0 else [stream_id]
+            for target in targets:
+                waiter = self.flow_waiters.pop(target, None)
+                if waiter and not waiter.done():
+                    waiter.set_result(None)
+
+        async def respond(self, stream_id):
+            await asyncio.sleep(latency)
+            self.conn.send_headers(stream_id, [
+                (':status', '200'),
+                ('content-type', 'image/jpeg'),
+                ('content-length', str(len(payload))),
+            ])
+            self.transport.write(self.conn.data_to_send())
+            data = payload
+            try:
+                while data:
+                    while self.conn.local_flow_control_window(stream_id) < 1:
+                        waiter = asyncio.get_running_loop().create_future()
+                        self.flow_waiters[stream_id] = waiter
+                        await waiter
+                    size = min(self.conn.local_flow_control_window(stream_id), len(data),
+                               self.conn.max_outbound_frame_size)
+                    self.conn.send_data(stream_id, data[:size], end_stream=(size == len(data)))
+                    data = data[size:]
+                    self.transport.write(self.conn.data_to_send())
+            except (asyncio.CancelledError, h2.exceptions.StreamClosedError):
+                pass
+
+    ready = threading.Event()
+    port = []
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        server = loop.run_until_complete(loop.create_server(H2Protocol, '127.0.0.1', 0))
+        port.append(server.sockets[0].getsockname()[1])
+        ready.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    ready.wait()
+    return port[0]
+
+def run_round(transport, base_url, images, workers, output_dir):
+    """并发下载 images 张图片，返回 (耗时, 成功数)"""
+    headers = {'User-Agent': 'yys-benchmark'}
+    urls = [f"{base_url}/data/picture/20240101/{i}/1920x1080.jpg" for i in range(images)]
+    paths = [os.path.join(output_dir, f"{i}.jpg") for i in range(images)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda item: download_image(item[0], item[1], headers, transport=transport),
+            zip(urls, paths)
+        ))
+    return time.perf_counter() - start, sum(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/1.1 连接池与 HTTP/2 多路复用的下载基准测试")
+    parser.add_argument("--images", type=int, default=64, help="每轮下载的图片数")
+    parser.add_argument("--size-kb", type=int, default=512, help="单张图片大小（KB）")
+    parser.add_argument("--latency-ms", type=float, default=30, help="服务器处理每个请求的延迟（毫秒）")
+    parser.add_argument("--workers", type=int, default=8, help="并发下载线程数")
+    parser.add_argument("--rounds", type=int, default=3, help="重复轮数")
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size_kb * 1024)
+    latency = args.latency_ms / 1000
+    total_bytes = len(payload) * args.images
+
+    cases = []
+    h1_stats = ServerStats()
+    h1_port = start_http1_server(payload, latency, h1_stats)
+    cases.append(("HTTP/1.1 连接池", yys_transport.RequestsTransport(pool_size=args.workers),
+                  f"http://127.0.0.1:{h1_port}", h1_stats))
+    try:
+        h2_stats = ServerStats()
+        h2_port = start_http2_server(payload, latency, h2_stats)
+        transport = yys_transport.HTTP2Transport(prior_knowledge=True, max_connections=1, log=print)
+        cases.append(("HTTP/2 多路复用", transport, f"http://127.0.0.1:{h2_port}", h2_stats))
+    except ImportError:
+        print("未安装 httpx[http2] / h2，跳过 HTTP/2 测试")
+
+    print(f"{args.images} 张 x {args.size_kb}KB | 服务器延迟 {args.latency_ms:.0f}ms | 并发 {args.workers}")
+    output_dir = tempfile.mkdtemp(prefix='yys_bench_')
+    try:
+        for name, transport, base_url, stats in cases:
+            timings = []
+            for _ in range(args.rounds):
+                elapsed, ok = run_round(transport, base_url, args.images, args.workers, output_dir)
+                if ok != args.images:
+                    print(f"{name}: 只成功下载 {ok}/{args.images} 张")
+                timings.append(elapsed)
+            connections, requests_count = stats.snapshot()
+            best = min(timings)
+            print(f"{name:<14} 最快 {best*1000:.0f}ms | 平均 {sum(timings)/len(timings)*1000:.0f}ms | "
+                  f"{total_bytes/best/1024/1024:.1f}MB/s | TCP 连接 {connections} 个 | 请求 {requests_count} 个")
+            transport.close()
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""多页面抓取自检：在本机生成一个模拟站点，检查 Crawler 的抓取范围与去重
+
+模拟站点结构:
+    /robots.txt              禁止抓取 /media/secret.html
+    /media/picture.html      入口页面，链接 page2（带不同锚点）、secret、/other/index.html
+    /media/page2.html        链接 page3
+    /media/page3.html
+    /media/secret.html       robots.txt 禁止
+    /other/index.html        入口页面所在目录之外，作为第二个入口页面时才抓取
+    /other/more.html
+
+用法:
+    python check_crawler.py
+任一检查失败时以非零状态码退出。
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+from collections import Counter
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from yys_crawler import Crawler
+
+HEADERS = {'User-Agent': 'yys-check'}
+RESOLUTION = '1920x1080'
+
+def image(name):
+    return f'<img src="/data/picture/20240101/{name}/{RESOLUTION}.jpg">'
+
+def link(href):
+    return f'<a href="{href}">{href}</a>'
+
+SITE = {
+    'robots.txt': "User-agent: *\nDisallow: /media/secret.html\n",
+    'media/picture.html': image(1) + link('page2.html#top') + link('page2.html#bottom')
+                          + link('secret.html') + link('/other/index.html') + link('picture.html'),
+    'media/page2.html': image(2) + link('page3.html') + link('picture.html#top'),
+    'media/page3.html': image(3),
+    'media/secret.html': image(4),
+    'other/index.html': image(5) + link('more.html'),
+    'other/more.html': image(6),
+}
+
+def build_site():
+    root = tempfile.mkdtemp(prefix='yys_site_')
+    for rel_path, content in SITE.items():
+        path = os.path.join(root, *rel_path.split('/'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    return root
+
+def start_server(root, requests_seen):
+    """启动静态文件服务器，记录每个路径被请求的次数"""
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            requests_seen[self.path] += 1
+            super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(Handler, directory=root))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def image_ids(urls):
+    return sorted(int(url.split('/')[-2]) for url in urls)
+
+def crawl(base, requests_seen, depth, extra=(), max_pages=50):
+    requests_seen.clear()
+    crawler = Crawler([base + '/media/picture.html', *extra], HEADERS, RESOLUTION,
+                      max_depth=depth, max_pages=max_pages, delay=0)
+    return image_ids(crawler.crawl())
+
+def main():
+    root = build_site()
+    requests_seen = Counter()
+    server, base = start_server(root, requests_seen)
+
+    def check_depth_0():
+        found = crawl(base, requests_seen, 0)
+        assert found == [1], f"深度 0 只应抓取入口页面: {found}"
+        assert '/robots.txt' not in requests_seen, "深度 0 不应请求 robots.txt"
+
+    def check_depth_1():
+        found = crawl(base, requests_seen, 1)
+        assert found == [1, 2], f"深度 1 的图片不正确: {found}"
+        assert requests_seen['/media/page2.html'] == 1, "不同锚点的同一页面应只抓取一次"
+        assert requests_seen['/media/picture.html'] == 1, "入口页面不应重复抓取"
+
+    def check_depth_2():
+        found = crawl(base, requests_seen, 2)
+        assert found == [1, 2, 3], f"深度 2 的图片不正确: {found}"
+        assert '/media/secret.html' not in requests_seen, "robots.txt 禁止的页面不应抓取"
+        assert '/other/index.html' not in requests_seen, "入口页面所在目录之外的页面不应抓取"
+
+    def check_extra_seed():
+        found = crawl(base, requests_seen, 1, extra=[base + '/other/index.html'])
+        assert found == [1, 2, 5, 6], f"第二个入口页面所在目录下的链接应被跟随: {found}"
+
+    def check_max_pages():
+        found = crawl(base, requests_seen, 2, max_pages=2)
+        pages = sum(count for path, count in requests_seen.items() if path.endswith('.html'))
+        assert pages == 2, f"最多抓取 2 个页面，实际 {pages} 个"
+        assert found == [1, 2], f"页面数受限时的图片不正确: {found}"
+
+    checks = [
+        ("深度 0", check_depth_0),
+        ("深度 1 与锚点去重", check_depth_1),
+        ("深度 2、robots.txt 与范围限制", check_depth_2),
+        ("多个入口页面", check_extra_seed),
+        ("页面数上限", check_max_pages),
+    ]
+    failed = False
+    try:
+        for name, check in checks:
+            print(f"{name}:")
+            try:
+                check()
+            except AssertionError as e:
+                print(f"    失败: {e}")
+                failed = True
+            else:
+                print("    通过")
+    finally:
+        server.shutdown()
+        shutil.rmtree(root, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
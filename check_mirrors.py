@@ -0,0 +1,152 @@
+"""多节点下载自检：在本机启动快、慢、出错三个模拟服务器，检查 EndpointPool 的行为
+
+检查项目:
+1. 测速后正常节点按速度排序，出错节点排在最后
+2. 最佳节点首字节过慢时发起对冲请求，快节点胜出
+3. 请求失败时切换到下一个节点
+4. 连续失败 3 次的节点移出轮换，下线期满后排在最后，再失败一次重新下线
+
+用法:
+    python check_mirrors.py
+任一检查失败时以非零状态码退出。
+"""
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from yys_mirrors import EndpointPool
+
+HEADERS = {'User-Agent': 'yys-check'}
+SAMPLE_PATH = '/data/picture/20240101/1/1920x1080.jpg'
+
+class QuietServer(ThreadingHTTPServer):
+    """落败的对冲请求会被客户端提前断开，不打印连接重置错误"""
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+def start_server(latency=0.0, rate=None, status=200, size=256 * 1024):
+    """启动模拟服务器，返回 (地址, 请求计数)
+
+    latency 为首字节延迟（秒），rate 为限速（字节/秒），status 非 200 时直接返回错误
+    """
+    payload = b'\xff' * size
+    counter = {'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            with lock:
+                counter['requests'] += 1
+            time.sleep(latency)
+            if status != 200:
+                self.send_error(status)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            chunk = 16 * 1024
+            for offset in range(0, len(payload), chunk):
+                self.wfile.write(payload[offset:offset + chunk])
+                if rate:
+                    time.sleep(chunk / rate)
+
+        def log_message(self, *args):
+            pass
+
+    server = QuietServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", counter
+
+def sample_url(base):
+    return base + SAMPLE_PATH
+
+def check_ranking(fast, slow, failing):
+    pool = EndpointPool([failing, slow, fast], include_origin=False)
+    try:
+        ranked = pool.probe(sample_url(fast), HEADERS)
+        names = [ep.name for ep in ranked]
+        for line in pool.describe():
+            print(f"    {line}")
+        assert names == [fast, slow, failing], f"测速后排序错误: {names}"
+    finally:
+        pool.close()
+
+def check_hedge(fast, slow):
+    # 都未测速时按配置顺序，慢节点排在第一位
+    pool = EndpointPool([slow, fast], include_origin=False, hedge_delay=0.2)
+    try:
+        start = time.perf_counter()
+        response, endpoint = pool.open_stream(sample_url(fast), HEADERS)
+        elapsed = time.perf_counter() - start
+        response.close()
+        print(f"    胜出节点 {endpoint.name}，耗时 {elapsed*1000:.0f}ms")
+        assert endpoint.name == fast, f"对冲请求应由快节点胜出，实际为 {endpoint.name}"
+        assert elapsed < 0.8, f"对冲请求耗时过长: {elapsed:.2f}s"
+    finally:
+        pool.close()
+
+def check_failover(fast, failing):
+    pool = EndpointPool([failing, fast], include_origin=False)
+    try:
+        response, endpoint = pool.open_stream(sample_url(fast), HEADERS)
+        response.close()
+        assert endpoint.name == fast, f"失败后应切换到正常节点，实际为 {endpoint.name}"
+        assert pool.ranked()[0].name == fast, "刚失败的节点不应排在正常节点之前"
+    finally:
+        pool.close()
+
+def check_disable(fast, failing, failing_counter):
+    pool = EndpointPool([failing, fast], include_origin=False, cooldown=0.5)
+    try:
+        for _ in range(3):
+            pool.probe(sample_url(fast), HEADERS)
+        names = [ep.name for ep in pool.ranked()]
+        assert failing not in names, f"连续失败 3 次后应移出轮换: {names}"
+
+        before = failing_counter['requests']
+        for _ in range(5):
+            response, endpoint = pool.open_stream(sample_url(fast), HEADERS)
+            response.close()
+        assert failing_counter['requests'] == before, "下线期间不应再请求出错节点"
+
+        time.sleep(0.6)
+        names = [ep.name for ep in pool.ranked()]
+        assert names == [fast, failing], f"下线期满后应排在最后: {names}"
+
+        pool.probe(sample_url(fast), HEADERS)
+        names = [ep.name for ep in pool.ranked()]
+        assert failing not in names, f"下线期满后再失败一次应重新下线: {names}"
+    finally:
+        pool.close()
+
+def main():
+    fast, _ = start_server(latency=0.01)
+    slow, _ = start_server(latency=0.6, rate=256 * 1024)
+    failing, failing_counter = start_server(status=500)
+
+    checks = [
+        ("测速排序", lambda: check_ranking(fast, slow, failing)),
+        ("对冲请求", lambda: check_hedge(fast, slow)),
+        ("故障转移", lambda: check_failover(fast, failing)),
+        ("连续失败下线", lambda: check_disable(fast, failing, failing_counter)),
+    ]
+    failed = False
+    for name, check in checks:
+        print(f"{name}:")
+        try:
+            check()
+        except AssertionError as e:
+            print(f"    失败: {e}")
+            failed = True
+        else:
+            print("    通过")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,76 @@
-import requests
-from bs4 import BeautifulSoup
 import os
+import sys
+import threading
 import time
 from urllib.parse import urljoin
 
-def download_image(url, save_path, headers):
+# requests 和 bs4 导入较慢，在用户选择分类时于后台线程中预热
+HEAVY_MODULES = ('requests', 'bs4', 'yys_mirrors', 'yys_transcode', 'yys_planner', 'yys_crawler', 'yys_transport')
+
+def warm_up_imports():
+    """在后台线程中预先导入网络和解析相关模块"""
+    def worker():
+        for name in HEAVY_MODULES:
+            try:
+                __import__(name)
+            except ImportError:
+                pass
+    
+    thread = threading.Thread(target=worker, name="warm-up-imports")
+    thread.daemon = True
+    thread.start()
+    return thread
+
+def download_image(url, save_path, headers, endpoints=None, bytes_callback=None, transport=None):
+    endpoint = None
     try:
+        import requests
         print(f"开始下载: {url}")
-        response = requests.get(url, headers=headers, timeout=15, stream=True)
+        if endpoints:
+            # 多节点模式：按测速结果选择节点，慢节点对冲，失败自动切换
+            response, endpoint = endpoints.open_stream(url, headers, timeout=15)
+            if endpoint.base:
+                print(f"使用镜像节点: {endpoint.name}")
+        elif transport:
+            response = transport.open(url, headers, timeout=15)
+        else:
+            response = requests.get(url, headers=headers, timeout=15, stream=True)
         response.raise_for_status()
         total_size = int(response.headers.get('content-length', 0))
         downloaded_size = 0
+        start_time = time.perf_counter()
         
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
+        try:
+            with open(save_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+                        downloaded_size += len(chunk)
+                        if bytes_callback:
+                            bytes_callback(len(chunk))
+        finally:
+            response.close()
         
+        if endpoint:
+            endpoints.record_transfer(endpoint, downloaded_size, time.perf_counter() - start_time)
         print(f"下载成功: {os.path.basename(save_path)} ({downloaded_size/1024:.1f}KB)")
         return True
     except Exception as e:
+        if endpoint and endpoints.record_failure(endpoint):
+            print(f"节点连续失败，暂时移出轮换: {endpoint.name}")
         print(f"下载失败 {url}: {e}")
         return False
 
+def build_file_name(img_url, category, index, resolution):
+    """根据图片URL生成文件名，能解析出日期和序号时使用日期命名"""
+    if '/data/picture/' in img_url:
+        parts = img_url.split('/data/picture/')[-1].split('/')
+        if len(parts) >= 3:
+            date = parts[0]
+            seq = parts[1]
+            return f"{date}_{seq}_{resolution}.jpg"
+    return f"{category}_{index}_{resolution}.jpg"
+
 def get_image_category(resolution):
     """根据分辨率判断图片分类"""
     horizontal_res = {'1366x768', '1440x900', '1920x1080', '2048x1536', '2208x1242', '2732x2048'}
@@ -59,7 +106,7 @@ def select_output_directory():
     
     return output_dir
 
-def scrape_yys_images(url, output_dir='yys_images', resolution='1920x1080', category=None, batch_size=10):
+def scrape_yys_images(url, output_dir='yys_images', resolution='1920x1080', category=None, batch_size=10, dry_run=False):
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
@@ -87,39 +134,14 @@ def scrape_yys_images(url, output_dir='yys_images', resolution='1920x1080', cate
     print(f"当前选择: {category} | 分辨率: {resolution}")
     print(f"实际保存目录: {os.path.abspath(actual_output_dir)}")
     
+    # 下载过程中创建的进程池和连接，出错时也要在 finally 中关闭
+    transcoder = transport = endpoints = dedup = size_cache = pool = None
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        response.encoding = 'utf-8'
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        image_urls = []
-        
-        a_tags = soup.find_all('a')
-        for a in a_tags:
-            href = a.get('href')
-            if href and resolution in href:
-                if not href.startswith('http'):
-                    href = urljoin(url, href)
-                image_urls.append(href)
+        import yys_crawler
         
-        img_tags = soup.find_all('img')
-        for img in img_tags:
-            src = img.get('data-src') or img.get('src')
-            if src:
-                full_url = urljoin(url, src)
-                if resolution in full_url:
-                    image_urls.append(full_url)
-        
-        data_items = soup.find_all(['div', 'span'], {'data-src': True})
-        for item in data_items:
-            src = item.get('data-src')
-            if src and resolution in src:
-                full_url = urljoin(url, src)
-                image_urls.append(full_url)
-        
-        image_urls = list(set(image_urls))
+        # 从入口页面出发抓取页面（可跟随翻页和相关图集），收集所有图片地址
+        crawler = yys_crawler.Crawler.from_env(url, headers, resolution, log=print)
+        image_urls = list(crawler.crawl())
         
         filtered_urls = []
         for img_url in image_urls:
@@ -167,9 +189,108 @@ def scrape_yys_images(url, output_dir='yys_images', resolution='1920x1080', cate
         success_count = 0
         downloaded_count = 0
         
+        import yys_transcode
+        transcoder = yys_transcode.Transcoder.from_env(log=print)
+        if transcoder:
+            print(f"转码存储模式: {transcoder.fmt.upper()} 质量 {transcoder.quality}，"
+                  f"{'保留' if transcoder.keep_original else '删除'}原图")
+        
+        # 规划阶段：确定保存路径，并发获取每张图片的大小
+        import yys_planner
+        plan_items = []
+        for i, img_url in enumerate(image_urls, 1):
+            save_path = os.path.join(actual_output_dir, build_file_name(img_url, category, i, resolution))
+            existing_path = yys_transcode.existing_image_path(save_path)
+            plan_items.append(yys_planner.PlanItem(img_url, save_path, existing_path))
+        
+        print("正在统计下载大小...")
+        size_cache = yys_planner.SizeCache()
+        plan = yys_planner.plan_downloads(plan_items, headers, size_cache)
+        for line in plan.report():
+            print(line)
+        
+        if dry_run:
+            print("仅预估模式，不下载图片")
+            return
+        
+        tracker = yys_planner.ProgressTracker(plan.total_bytes, plan.fetch_bytes)
+        
+        import yys_transport
+        transport = yys_transport.transport_from_env(log=print)
+        print(f"传输协议: {transport.name}")
+        
+        import yys_mirrors
+        # YYS_DOWNLOAD_WORKERS 大于 1 时同时下载多张图片，HTTP/2 下多个图片流复用同一个连接
+        workers = yys_transport.download_workers_from_env()
+        endpoints = yys_mirrors.EndpointPool.from_env(transport=transport, download_workers=workers)
+        if len(endpoints) > 1 and image_urls:
+            print("正在测速下载节点...")
+            endpoints.probe(image_urls[0], headers)
+            for line in endpoints.describe():
+                print(f"  {line}")
+        else:
+            endpoints = None
+        
+        # 感知哈希去重：识别换了路径重新发布的同一张图片
+        dedup = None
+        if os.environ.get('YYS_DEDUP'):
+            try:
+                import yys_phash
+                dedup = yys_phash.DuplicateChecker.from_env()
+            except ImportError:
+                print("感知哈希去重需要安装 numpy 和 Pillow，已禁用")
+        if dedup:
+            print("正在更新图库感知哈希索引...")
+            count = dedup.open(actual_output_dir)
+            print(f"索引共 {len(dedup.index)} 张图片，本次新计算 {count} 张")
+            if not yys_phash.preview_resolution(resolution, category):
+                print(f"{category} {resolution} 没有同比例的更小预览版本，将在下载完成后比对原图")
+        
+        def on_transcoded(src_path, dst_path, error):
+            if error:
+                print(f"转码失败 {os.path.basename(src_path)}: {error}")
+            else:
+                print(f"转码完成: {os.path.basename(dst_path)}")
+        
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='yys-download')
+            print(f"同时下载 {workers} 张图片")
+        count_lock = threading.Lock()
+        
+        def fetch(img_url, save_path, file_name, precheck):
+            """下载一张图片并完成去重比对、转码等后续处理"""
+            nonlocal success_count
+            tracker.begin(plan.size_of(img_url), save_path)
+            try:
+                downloaded = download_image(img_url, save_path, headers, endpoints,
+                                            lambda size: tracker.advance(size, save_path), transport)
+            finally:
+                tracker.end(save_path)
+            if downloaded and dedup and not precheck:
+                match = dedup.check_file(save_path)
+                if match:
+                    distance, dup_path = match
+                    print(f"疑似重复图片: 与 {os.path.basename(dup_path)} 相似 (汉明距离 {distance})")
+                    if dedup.skip:
+                        os.remove(save_path)
+                        print(f"已删除重复图片: {file_name}")
+                        downloaded = False
+            if downloaded:
+                with count_lock:
+                    success_count += 1
+                    print(f"下载成功计数: {success_count}")
+                size_cache.put(img_url, os.path.getsize(save_path))
+                if precheck:
+                    dedup.add_file(save_path)
+                if transcoder:
+                    transcoder.submit(save_path, on_transcoded)
+            print(tracker.describe())
+        
         while downloaded_count < total_images:
             batch_end = min(downloaded_count + batch_size, total_images)
             batch_urls = image_urls[downloaded_count:batch_end]
+            pending = []
             
             print(f"\n正在下载第 {downloaded_count + 1}-{batch_end} 张图片 (共 {total_images} 张)...")
             
@@ -183,37 +304,54 @@ def scrape_yys_images(url, output_dir='yys_images', resolution='1920x1080', cate
                     # 确保URL格式正确
                     if not img_url.startswith('http'):
                         print(f"URL格式错误，跳过: {img_url}")
+                        tracker.skip(plan.size_of(img_url), plan.will_fetch(img_url))
                         continue
                     
-                    file_name = f"{category}_{i}_{resolution}.jpg"
-                    if '/data/picture/' in img_url:
-                        try:
-                            parts = img_url.split('/data/picture/')[-1].split('/')
-                            if len(parts) >= 3:
-                                date = parts[0]
-                                seq = parts[1]
-                                file_name = f"{date}_{seq}_{resolution}.jpg"
-                                print(f"使用日期命名: {file_name}")
-                        except Exception as e:
-                            print(f"解析URL失败: {e}")
-                            pass
+                    file_name = build_file_name(img_url, category, i, resolution)
+                    if not file_name.startswith(category):
+                        print(f"使用日期命名: {file_name}")
                     
                     save_path = os.path.join(actual_output_dir, file_name)
                     print(f"保存路径: {save_path}")
                     
-                    if os.path.exists(save_path):
-                        print(f"文件已存在，跳过下载: {file_name}")
+                    existing_path = yys_transcode.existing_image_path(save_path)
+                    if existing_path:
+                        print(f"文件已存在，跳过下载: {os.path.basename(existing_path)}")
+                        tracker.skip(plan.size_of(img_url), plan.will_fetch(img_url))
+                        # 开启转码前下载的原图，补充转码
+                        if transcoder and existing_path == save_path:
+                            transcoder.submit(save_path, on_transcoded)
                         continue
                     
-                    if download_image(img_url, save_path, headers):
-                        success_count += 1
-                        print(f"下载成功计数: {success_count}")
+                    # 有更小的预览版本时下载前比对，否则下载完成后比对原图
+                    precheck = dedup and dedup.can_precheck(img_url, resolution, category)
+                    if precheck:
+                        match = dedup.check(img_url, resolution, category, headers)
+                        if match:
+                            distance, dup_path = match
+                            print(f"疑似重复图片: 与 {os.path.basename(dup_path)} 相似 (汉明距离 {distance})")
+                            if dedup.skip:
+                                print(f"跳过下载: {file_name}")
+                                tracker.skip(plan.size_of(img_url), plan.will_fetch(img_url))
+                                continue
+                    
+                    if pool:
+                        pending.append(pool.submit(fetch, img_url, save_path, file_name, precheck))
+                        continue
+                    fetch(img_url, save_path, file_name, precheck)
                     
                     time.sleep(0.5)
                 except Exception as e:
                     print(f"处理图片时出错: {e}")
                     continue
             
+            # 等待本批并发下载完成后再询问是否继续
+            for future in pending:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"处理图片时出错: {e}")
+            
             downloaded_count = batch_end
             
             if downloaded_count < total_images:
@@ -238,9 +376,30 @@ def scrape_yys_images(url, output_dir='yys_images', resolution='1920x1080', cate
         
     except Exception as e:
         print(f"发生错误: {e}")
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if endpoints:
+            endpoints.close()
+        if transport:
+            transport.close()
+        if size_cache:
+            size_cache.save()
+        if dedup:
+            dedup.close()
+        # 仅预估模式不会提交转码任务
+        if transcoder and not dry_run:
+            print("等待转码任务完成...")
+            transcoder.close()
+            print(transcoder.summary())
 
 if __name__ == "__main__":
     url = "https://yys.163.com/media/picture.html"
+    # --dry-run: 只统计需要下载的张数和字节数，不下载
+    dry_run = '--dry-run' in sys.argv
+    
+    # 用户输入选项期间在后台加载 requests/bs4
+    warm_up_imports()
     
     category_resolutions = {
         '横版': ['1366x768', '1440x900', '1920x1080', '2048x1536', '2208x1242', '2732x2048'],
@@ -281,5 +440,5 @@ if __name__ == "__main__":
         print(f"未选择文件夹，使用默认目录: {output_dir}")
     
     print(f"\n开始下载 {category} | {resolution} 的图片到 {output_dir}...")
-    scrape_yys_images(url, output_dir=output_dir, resolution=resolution, category=category)
+    scrape_yys_images(url, output_dir=output_dir, resolution=resolution, category=category, dry_run=dry_run)
 
@@ -2,39 +2,88 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import threading
 import os
-import requests
-from bs4 import BeautifulSoup
 import time
 from urllib.parse import urljoin
 import re
 
-def download_image(url, save_path, headers, callback=None, progress_callback=None):
+from yys_thumbnails import ThumbnailGallery
+
+# requests 和 bs4 导入较慢，只在真正开始下载时才需要，
+# 因此不在模块顶层导入，窗口显示后再在后台线程中预热
+HEAVY_MODULES = ('requests', 'bs4', 'yys_mirrors', 'yys_transcode', 'yys_planner', 'yys_crawler', 'yys_transport')
+
+def warm_up_imports():
+    """在后台线程中预先导入网络和解析相关模块"""
+    def worker():
+        for name in HEAVY_MODULES:
+            try:
+                __import__(name)
+            except ImportError:
+                pass
+    
+    thread = threading.Thread(target=worker, name="warm-up-imports")
+    thread.daemon = True
+    thread.start()
+    return thread
+
+def download_image(url, save_path, headers, callback=None, progress_callback=None, endpoints=None, bytes_callback=None,
+                   transport=None):
+    endpoint = None
     try:
+        import requests
         if callback:
             callback(f"开始下载: {url}")
-        response = requests.get(url, headers=headers, timeout=15, stream=True)
+        if endpoints:
+            # 多节点模式：按测速结果选择节点，慢节点对冲，失败自动切换
+            response, endpoint = endpoints.open_stream(url, headers, timeout=15)
+            if callback and endpoint.base:
+                callback(f"使用镜像节点: {endpoint.name}")
+        elif transport:
+            response = transport.open(url, headers, timeout=15)
+        else:
+            response = requests.get(url, headers=headers, timeout=15, stream=True)
         response.raise_for_status()
         total_size = int(response.headers.get('content-length', 0))
         downloaded_size = 0
+        start_time = time.perf_counter()
         
-        with open(save_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    # 更新下载进度
-                    if progress_callback and total_size > 0:
-                        progress = (downloaded_size / total_size) * 100
-                        progress_callback(progress)
-        
+        try:
+            with open(save_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+                        downloaded_size += len(chunk)
+                        if bytes_callback:
+                            bytes_callback(len(chunk))
+                        # 更新下载进度
+                        if progress_callback and total_size > 0:
+                            progress = (downloaded_size / total_size) * 100
+                            progress_callback(progress)
+        finally:
+            response.close()
+        
+        if endpoint:
+            endpoints.record_transfer(endpoint, downloaded_size, time.perf_counter() - start_time)
         if callback:
             callback(f"下载成功: {os.path.basename(save_path)} ({downloaded_size/1024:.1f}KB)")
         return True
     except Exception as e:
+        if endpoint and endpoints.record_failure(endpoint) and callback:
+            callback(f"节点连续失败，暂时移出轮换: {endpoint.name}")
         if callback:
             callback(f"下载失败 {url}: {e}")
         return False
 
+def build_file_name(img_url, category, index, resolution):
+    """根据图片URL生成文件名，能解析出日期和序号时使用日期命名"""
+    if '/data/picture/' in img_url:
+        parts = img_url.split('/data/picture/')[-1].split('/')
+        if len(parts) >= 3:
+            date = parts[0]
+            seq = parts[1]
+            return f"{date}_{seq}_{resolution}.jpg"
+    return f"{category}_{index}_{resolution}.jpg"
+
 def get_image_category(resolution):
     horizontal_res = {'1366x768', '1440x900', '1920x1080', '2048x1536', '2208x1242', '2732x2048'}
     vertical_res = {'640x960', '640x1136', '720x1280', '750x1334', '1080x1920'}
@@ -133,10 +182,22 @@ class YYSImageDownloaderGUI:
         self.dir_var = tk.StringVar(value=self.output_dir)
         self.dir_entry = ttk.Entry(dir_inner_frame, textvariable=self.dir_var)
         self.dir_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
+        # 手动输入的目录在回车或离开输入框时显示到预览
+        self.dir_entry.bind('<Return>', lambda e: self.on_directory_entered())
+        self.dir_entry.bind('<FocusOut>', lambda e: self.on_directory_entered())
         
         self.browse_btn = ttk.Button(dir_inner_frame, text="浏览", command=self.browse_directory)
         self.browse_btn.pack(side=tk.RIGHT)
         
+        # 仅预估：只统计需要下载的张数和字节数
+        self.dry_run_var = tk.BooleanVar(value=False)
+        self.dry_run_check = ttk.Checkbutton(
+            self.dir_frame,
+            text="仅预估下载量（不下载）",
+            variable=self.dry_run_var
+        )
+        self.dry_run_check.pack(anchor=tk.W, pady=(8, 0))
+        
         # 按钮框架
         self.button_frame = ttk.Frame(self.main_frame)
         self.button_frame.pack(fill=tk.X, pady=(0, 15))
@@ -181,6 +242,11 @@ class YYSImageDownloaderGUI:
         self.total_progress_percent = ttk.Label(self.total_progress_frame, text="0%", width=5)
         self.total_progress_percent.pack(side=tk.RIGHT)
         
+        # 速度与剩余时间
+        self.speed_label = ttk.Label(self.progress_frame, text="速度: -- | 剩余: --")
+        self.speed_label.pack(fill=tk.X, pady=(0, 8))
+        self.last_total_update = 0.0
+        
         # 当前图片进度条
         self.current_progress_frame = ttk.Frame(self.progress_frame)
         self.current_progress_frame.pack(fill=tk.X)
@@ -199,9 +265,13 @@ class YYSImageDownloaderGUI:
         self.current_progress_percent = ttk.Label(self.current_progress_frame, text="0%", width=5)
         self.current_progress_percent.pack(side=tk.RIGHT)
         
+        # 下载状态与图片预览分为两个标签页
+        self.notebook = ttk.Notebook(self.main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
+        
         # 状态文本框
-        self.status_frame = ttk.LabelFrame(self.main_frame, text="下载状态", padding="10")
-        self.status_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 15))
+        self.status_frame = ttk.Frame(self.notebook, padding="10")
+        self.notebook.add(self.status_frame, text="下载状态")
         
         self.status_text = tk.Text(self.status_frame, height=12, wrap=tk.WORD)
         self.status_text.pack(fill=tk.BOTH, expand=True)
@@ -212,6 +282,10 @@ class YYSImageDownloaderGUI:
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.status_text['yscrollcommand'] = self.scrollbar.set
         
+        # 缩略图预览，只绘制可见行，下载完成的图片实时加入
+        self.gallery = ThumbnailGallery(self.notebook)
+        self.notebook.add(self.gallery, text="图片预览")
+        
         # 配置样式
         style = ttk.Style()
         try:
@@ -241,6 +315,16 @@ class YYSImageDownloaderGUI:
         if directory:
             self.output_dir = directory
             self.dir_var.set(directory)
+            self.gallery.set_directory(directory)
+    
+    def on_directory_entered(self):
+        """手动输入保存目录后刷新图片预览"""
+        directory = self.dir_var.get().strip()
+        if not directory or not os.path.isdir(directory):
+            return
+        if os.path.normpath(directory) != self.gallery.directory:
+            self.output_dir = directory
+            self.gallery.set_directory(directory)
     
     def write_status(self, text):
         """更新状态文本框"""
@@ -252,7 +336,21 @@ class YYSImageDownloaderGUI:
         
         self.root.after(0, update_text)
     
-    def scrape_yys_images(self, url, output_dir, resolution, category, batch_size=10):
+    def update_total_progress(self, tracker, force=False):
+        """按字节更新总进度、速度与剩余时间，最多每 0.2 秒刷新一次"""
+        now = time.monotonic()
+        if not force and now - self.last_total_update < 0.2:
+            return
+        self.last_total_update = now
+        import yys_planner
+        progress = tracker.fraction * 100
+        text = (f"{yys_planner.format_bytes(tracker.done_bytes)}/{yys_planner.format_bytes(tracker.total_bytes)} | "
+                f"速度: {yys_planner.format_bytes(tracker.throughput)}/s | 剩余: {yys_planner.format_eta(tracker.eta)}")
+        self.root.after(0, lambda: self.total_progress_var.set(progress))
+        self.root.after(0, lambda: self.total_progress_percent.config(text=f"{int(progress)}%"))
+        self.root.after(0, lambda: self.speed_label.config(text=text))
+    
+    def scrape_yys_images(self, url, output_dir, resolution, category, batch_size=10, dry_run=False):
         """爬取阴阳师图片"""
         headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -282,44 +380,20 @@ class YYSImageDownloaderGUI:
         
         # 更新界面显示的保存目录
         self.root.after(0, lambda: self.dir_var.set(actual_output_dir))
+        self.root.after(0, lambda: self.gallery.set_directory(actual_output_dir))
         
         self.write_status(f"正在访问网页: {url}\n")
         self.write_status(f"当前选择: {category} | 分辨率: {resolution}\n")
         self.write_status(f"实际保存目录: {os.path.abspath(actual_output_dir)}\n")
         
+        # 下载过程中创建的进程池和连接，出错时也要在 finally 中关闭
+        transcoder = transport = endpoints = dedup = size_cache = pool = None
         try:
-            response = requests.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
-            response.encoding = 'utf-8'
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            image_urls = []
+            import yys_crawler
             
-            a_tags = soup.find_all('a')
-            for a in a_tags:
-                href = a.get('href')
-                if href and resolution in href:
-                    if not href.startswith('http'):
-                        href = urljoin(url, href)
-                    image_urls.append(href)
-            
-            img_tags = soup.find_all('img')
-            for img in img_tags:
-                src = img.get('data-src') or img.get('src')
-                if src:
-                    full_url = urljoin(url, src)
-                    if resolution in full_url:
-                        image_urls.append(full_url)
-            
-            data_items = soup.find_all(['div', 'span'], {'data-src': True})
-            for item in data_items:
-                src = item.get('data-src')
-                if src and resolution in src:
-                    full_url = urljoin(url, src)
-                    image_urls.append(full_url)
-            
-            image_urls = list(set(image_urls))
+            # 从入口页面出发抓取页面（可跟随翻页和相关图集），收集所有图片地址
+            crawler = yys_crawler.Crawler.from_env(url, headers, resolution, log=lambda text: self.write_status(text + "\n"))
+            image_urls = list(crawler.crawl())
             
             filtered_urls = []
             for img_url in image_urls:
@@ -363,12 +437,128 @@ class YYSImageDownloaderGUI:
             success_count = 0
             downloaded_count = 0
             
+            import yys_transcode
+            transcoder = yys_transcode.Transcoder.from_env(log=lambda text: self.write_status(text + "\n"))
+            if transcoder:
+                self.write_status(f"转码存储模式: {transcoder.fmt.upper()} 质量 {transcoder.quality}，"
+                                  f"{'保留' if transcoder.keep_original else '删除'}原图\n")
+            
+            # 规划阶段：确定保存路径，并发获取每张图片的大小
+            import yys_planner
+            plan_items = []
+            for i, img_url in enumerate(image_urls, 1):
+                save_path = os.path.join(actual_output_dir, build_file_name(img_url, category, i, resolution))
+                existing_path = yys_transcode.existing_image_path(save_path)
+                plan_items.append(yys_planner.PlanItem(img_url, save_path, existing_path))
+            
+            self.write_status("正在统计下载大小...\n")
+            size_cache = yys_planner.SizeCache()
+            plan = yys_planner.plan_downloads(plan_items, headers, size_cache)
+            for line in plan.report():
+                self.write_status(f"{line}\n")
+            
+            if dry_run:
+                self.write_status("仅预估模式，不下载图片\n")
+                return
+            
+            tracker = yys_planner.ProgressTracker(plan.total_bytes, plan.fetch_bytes)
+            
+            import yys_transport
+            transport = yys_transport.transport_from_env(log=lambda text: self.write_status(text + "\n"))
+            self.write_status(f"传输协议: {transport.name}\n")
+            
+            import yys_mirrors
+            # YYS_DOWNLOAD_WORKERS 大于 1 时同时下载多张图片，HTTP/2 下多个图片流复用同一个连接
+            workers = yys_transport.download_workers_from_env()
+            endpoints = yys_mirrors.EndpointPool.from_env(transport=transport, download_workers=workers)
+            if len(endpoints) > 1 and image_urls:
+                self.write_status("正在测速下载节点...\n")
+                endpoints.probe(image_urls[0], headers)
+                for line in endpoints.describe():
+                    self.write_status(f"  {line}\n")
+            else:
+                endpoints = None
+            
+            # 感知哈希去重：识别换了路径重新发布的同一张图片
+            dedup = None
+            if os.environ.get('YYS_DEDUP'):
+                try:
+                    import yys_phash
+                    dedup = yys_phash.DuplicateChecker.from_env()
+                except ImportError:
+                    self.write_status("感知哈希去重需要安装 numpy 和 Pillow，已禁用\n")
+            if dedup:
+                self.write_status("正在更新图库感知哈希索引...\n")
+                count = dedup.open(actual_output_dir)
+                self.write_status(f"索引共 {len(dedup.index)} 张图片，本次新计算 {count} 张\n")
+                if not yys_phash.preview_resolution(resolution, category):
+                    self.write_status(f"{category} {resolution} 没有同比例的更小预览版本，将在下载完成后比对原图\n")
+            
+            def on_transcoded(src_path, dst_path, error):
+                if error:
+                    self.write_status(f"转码失败 {os.path.basename(src_path)}: {error}\n")
+                    return
+                self.write_status(f"转码完成: {os.path.basename(dst_path)}\n")
+                self.root.after(0, lambda: self.gallery.add_image(dst_path))
+                if not transcoder.keep_original:
+                    self.root.after(0, lambda: self.gallery.remove_image(src_path))
+            
             # 重置进度条
             self.root.after(0, lambda: self.total_progress_var.set(0))
             self.root.after(0, lambda: self.total_progress_percent.config(text="0%"))
             self.root.after(0, lambda: self.current_progress_var.set(0))
             self.root.after(0, lambda: self.current_progress_percent.config(text="0%"))
+            self.root.after(0, lambda: self.speed_label.config(text="速度: -- | 剩余: --"))
         
+            if workers > 1:
+                from concurrent.futures import ThreadPoolExecutor
+                pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='yys-download')
+                self.write_status(f"同时下载 {workers} 张图片\n")
+            count_lock = threading.Lock()
+            
+            # 当前图片进度回调
+            def current_progress_callback(progress):
+                self.root.after(0, lambda p=progress: self.current_progress_var.set(p))
+                self.root.after(0, lambda p=progress: self.current_progress_percent.config(text=f"{int(p)}%"))
+            
+            def fetch(img_url, save_path, file_name, precheck):
+                """下载一张图片并完成去重比对、转码等后续处理"""
+                nonlocal success_count
+                
+                # 按字节更新总进度
+                def bytes_callback(size):
+                    tracker.advance(size, save_path)
+                    self.update_total_progress(tracker)
+                
+                tracker.begin(plan.size_of(img_url), save_path)
+                try:
+                    downloaded = download_image(img_url, save_path, headers, self.write_status,
+                                                current_progress_callback, endpoints, bytes_callback, transport)
+                finally:
+                    tracker.end(save_path)
+                if downloaded and dedup and not precheck:
+                    match = dedup.check_file(save_path)
+                    if match:
+                        distance, dup_path = match
+                        self.write_status(f"疑似重复图片: 与 {os.path.basename(dup_path)} 相似 (汉明距离 {distance})\n")
+                        if dedup.skip:
+                            os.remove(save_path)
+                            self.write_status(f"已删除重复图片: {file_name}\n")
+                            downloaded = False
+                if downloaded:
+                    with count_lock:
+                        success_count += 1
+                        self.write_status(f"下载成功计数: {success_count}\n")
+                    size_cache.put(img_url, os.path.getsize(save_path))
+                    if precheck:
+                        dedup.add_file(save_path)
+                    self.root.after(0, lambda p=save_path: self.gallery.add_image(p))
+                    if transcoder:
+                        transcoder.submit(save_path, on_transcoded)
+                
+                # 更新总进度
+                self.update_total_progress(tracker, force=True)
+            
             while downloaded_count < total_images:
                 # 检查是否需要停止
                 if self.stop_flag.is_set():
@@ -377,6 +567,7 @@ class YYSImageDownloaderGUI:
                 
                 batch_end = min(downloaded_count + batch_size, total_images)
                 batch_urls = image_urls[downloaded_count:batch_end]
+                pending = []
                 
                 self.write_status(f"\n正在下载第 {downloaded_count + 1}-{batch_end} 张图片 (共 {total_images} 张)...\n")
                 
@@ -399,54 +590,63 @@ class YYSImageDownloaderGUI:
                         
                         if not img_url.startswith('http'):
                             self.write_status(f"URL格式错误，跳过: {img_url}\n")
+                            tracker.skip(plan.size_of(img_url), plan.will_fetch(img_url))
+                            self.update_total_progress(tracker, force=True)
                             continue
                         
-                        file_name = f"{category}_{i}_{resolution}.jpg"
-                        if '/data/picture/' in img_url:
-                            try:
-                                parts = img_url.split('/data/picture/')[-1].split('/')
-                                if len(parts) >= 3:
-                                    date = parts[0]
-                                    seq = parts[1]
-                                    file_name = f"{date}_{seq}_{resolution}.jpg"
-                                    self.write_status(f"使用日期命名: {file_name}\n")
-                            except Exception as e:
-                                self.write_status(f"解析URL失败: {e}\n")
-                                pass
+                        file_name = build_file_name(img_url, category, i, resolution)
+                        if not file_name.startswith(category):
+                            self.write_status(f"使用日期命名: {file_name}\n")
                         
                         save_path = os.path.join(actual_output_dir, file_name)
                         self.write_status(f"保存路径: {save_path}\n")
                         
-                        if os.path.exists(save_path):
-                            self.write_status(f"文件已存在，跳过下载: {file_name}\n")
-                            # 更新总进度
-                            progress = (i / total_images) * 100
-                            self.root.after(0, lambda p=progress: self.total_progress_var.set(p))
-                            self.root.after(0, lambda p=progress: self.total_progress_percent.config(text=f"{int(p)}%"))
+                        existing_path = yys_transcode.existing_image_path(save_path)
+                        if existing_path:
+                            self.write_status(f"文件已存在，跳过下载: {os.path.basename(existing_path)}\n")
+                            # 开启转码前下载的原图，补充转码
+                            if transcoder and existing_path == save_path:
+                                transcoder.submit(save_path, on_transcoded)
+                            tracker.skip(plan.size_of(img_url), plan.will_fetch(img_url))
+                            self.update_total_progress(tracker, force=True)
                             continue
                         
-                        # 当前图片进度回调
-                        def current_progress_callback(progress):
-                            self.root.after(0, lambda p=progress: self.current_progress_var.set(p))
-                            self.root.after(0, lambda p=progress: self.current_progress_percent.config(text=f"{int(p)}%"))
-                        
-                        if download_image(img_url, save_path, headers, self.write_status, current_progress_callback):
-                            success_count += 1
-                            self.write_status(f"下载成功计数: {success_count}\n")
+                        # 有更小的预览版本时下载前比对，否则下载完成后比对原图
+                        precheck = dedup and dedup.can_precheck(img_url, resolution, category)
+                        if precheck:
+                            match = dedup.check(img_url, resolution, category, headers)
+                            if match:
+                                distance, dup_path = match
+                                self.write_status(f"疑似重复图片: 与 {os.path.basename(dup_path)} 相似 (汉明距离 {distance})\n")
+                                if dedup.skip:
+                                    self.write_status(f"跳过下载: {file_name}\n")
+                                    tracker.skip(plan.size_of(img_url), plan.will_fetch(img_url))
+                                    self.update_total_progress(tracker, force=True)
+                                    continue
                         
-                        # 更新总进度
-                        progress = (i / total_images) * 100
-                        self.root.after(0, lambda p=progress: self.total_progress_var.set(p))
-                        self.root.after(0, lambda p=progress: self.total_progress_percent.config(text=f"{int(p)}%"))
+                        if pool:
+                            pending.append(pool.submit(fetch, img_url, save_path, file_name, precheck))
+                            continue
+                        fetch(img_url, save_path, file_name, precheck)
                         
                         time.sleep(0.5)
                     except Exception as e:
                         self.write_status(f"处理图片时出错: {e}\n")
                         # 更新总进度
-                        progress = (i / total_images) * 100
-                        self.root.after(0, lambda p=progress: self.total_progress_var.set(p))
-                        self.root.after(0, lambda p=progress: self.total_progress_percent.config(text=f"{int(p)}%"))
+                        self.update_total_progress(tracker, force=True)
+                        continue
+                
+                # 等待本批并发下载完成；停止时取消尚未开始的下载
+                for future in pending:
+                    if self.stop_flag.is_set():
+                        future.cancel()
+                    if future.cancelled():
                         continue
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.write_status(f"处理图片时出错: {e}\n")
+                        self.update_total_progress(tracker, force=True)
                 
                 downloaded_count = batch_end
                 
@@ -456,9 +656,25 @@ class YYSImageDownloaderGUI:
                 
                 self.write_status(f"\n下载完成! 成功下载 {success_count}/{downloaded_count} 张图片\n")
                 self.write_status(f"图片保存在: {os.path.abspath(actual_output_dir)}\n")
-            
+
         except Exception as e:
             self.write_status(f"发生错误: {e}\n")
+        finally:
+            if pool:
+                pool.shutdown(wait=True, cancel_futures=True)
+            if endpoints:
+                endpoints.close()
+            if transport:
+                transport.close()
+            if size_cache:
+                size_cache.save()
+            if dedup:
+                dedup.close()
+            # 仅预估模式不会提交转码任务
+            if transcoder and not dry_run:
+                self.write_status("等待转码任务完成...\n")
+                transcoder.close()
+                self.write_status(transcoder.summary() + "\n")
     
     def start_download(self):
         """开始下载"""
@@ -481,6 +697,7 @@ class YYSImageDownloaderGUI:
         self.resolution_combobox.config(state=tk.DISABLED)
         self.dir_entry.config(state=tk.DISABLED)
         self.browse_btn.config(state=tk.DISABLED)
+        self.dry_run_check.config(state=tk.DISABLED)
         
         # 清空状态文本
         self.status_text.config(state=tk.NORMAL)
@@ -490,13 +707,15 @@ class YYSImageDownloaderGUI:
         # 获取选择的值
         category = self.category_var.get()
         resolution = self.resolution_var.get()
+        dry_run = self.dry_run_var.get()
         
         # 在后台线程中执行下载
         def download_thread():
             try:
                 url = "https://yys.163.com/media/picture.html"
-                self.scrape_yys_images(url, output_dir=output_dir, resolution=resolution, category=category)
-                self.write_status("\n下载完成！\n")
+                self.scrape_yys_images(url, output_dir=output_dir, resolution=resolution, category=category, dry_run=dry_run)
+                if not dry_run:
+                    self.write_status("\n下载完成！\n")
             except Exception as e:
                 self.write_status(f"\n发生错误: {e}\n")
             finally:
@@ -508,6 +727,7 @@ class YYSImageDownloaderGUI:
                 self.root.after(0, lambda: self.resolution_combobox.config(state="readonly"))
                 self.root.after(0, lambda: self.dir_entry.config(state=tk.NORMAL))
                 self.root.after(0, lambda: self.browse_btn.config(state=tk.NORMAL))
+                self.root.after(0, lambda: self.dry_run_check.config(state=tk.NORMAL))
         
         self.download_thread = threading.Thread(target=download_thread)
         self.download_thread.daemon = True
@@ -533,16 +753,22 @@ class YYSImageDownloaderGUI:
             # 在后台等待线程完成后关闭窗口
             def wait_and_close():
                 self.download_thread.join(timeout=60)  # 最多等待60秒
-                self.root.after(0, self.root.destroy)
+                self.root.after(0, self.close_window)
             
             close_thread = threading.Thread(target=wait_and_close)
             close_thread.daemon = True
             close_thread.start()
         else:
             # 如果没有在下载，直接关闭
-            self.root.destroy()
+            self.close_window()
+    
+    def close_window(self):
+        """下载线程结束后关闭缩略图进程池并销毁窗口"""
+        self.gallery.close()
+        self.root.destroy()
 
-if __name__ == "__main__":
+def create_main_window():
+    """创建并显示主窗口，返回 (root, app)"""
     root = tk.Tk()
     # 设置窗口初始大小
     window_width = 320
@@ -560,4 +786,10 @@ if __name__ == "__main__":
     root.geometry(f"{window_width}x{window_height}+{x}+{y}")
     
     app = YYSImageDownloaderGUI(root)
+    # 窗口显示后再在后台加载 requests/bs4，避免拖慢启动
+    root.after(200, warm_up_imports)
+    return root, app
+
+if __name__ == "__main__":
+    root, app = create_main_window()
     root.mainloop()
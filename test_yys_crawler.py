@@ -0,0 +1,22 @@
+from yys_crawler import Crawler
+
+def from_env(monkeypatch, **env):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    return Crawler.from_env('https://example.com/media/picture.html', {}, '1920x1080')
+
+def test_from_env_defaults(monkeypatch):
+    crawler = from_env(monkeypatch)
+    assert (crawler.max_depth, crawler.max_pages, crawler.max_workers) == (0, 50, 4)
+    assert crawler.throttle.delay == 0.5
+
+def test_from_env_clamps_out_of_range_values(monkeypatch):
+    crawler = from_env(monkeypatch, YYS_CRAWL_DEPTH='-1', YYS_CRAWL_MAX_PAGES='0',
+                       YYS_CRAWL_DELAY='-2', YYS_CRAWL_WORKERS='0')
+    assert (crawler.max_depth, crawler.max_pages, crawler.max_workers) == (0, 1, 1)
+    assert crawler.throttle.delay == 0.0
+
+def test_from_env_ignores_invalid_values(monkeypatch):
+    crawler = from_env(monkeypatch, YYS_CRAWL_WORKERS='many', YYS_CRAWL_DELAY='slow')
+    assert crawler.max_workers == 4
+    assert crawler.throttle.delay == 0.5
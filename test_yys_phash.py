@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+PIL = pytest.importorskip('PIL')
+from PIL import Image
+
+import yys_phash
+from yys_phash import DuplicateChecker, PHashIndex, hamming_distances, preview_resolution
+
+def save_image(path, seed, size=(64, 36)):
+    """生成随机纹理图片，不同 seed 的哈希差异很大"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (8, 8), dtype=np.uint8)
+    Image.fromarray(small, 'L').resize(size, Image.BILINEAR).convert('RGB').save(path)
+    return str(path)
+
+@pytest.mark.parametrize('resolution, category, expected', [
+    ('1920x1080', '横版', '1366x768'),
+    ('2208x1242', '横版', '1366x768'),
+    ('2732x2048', '横版', '2048x1536'),
+    ('1440x900', '横版', None),
+    ('1366x768', '横版', None),
+    ('720x1280', '竖版', '640x1136'),
+    ('1080x1920', '竖版', '640x1136'),
+    ('640x960', '竖版', None),
+    ('640x1136', '竖版', None),
+    ('1080x2340', '手机壁纸', None),
+])
+def test_preview_keeps_aspect_ratio(resolution, category, expected):
+    assert preview_resolution(resolution, category) == expected
+
+def test_preview_url_replaces_resolution():
+    url = 'https://yys.res.netease.com/pc/zt/20161108171335/data/picture/20240101/1/1920x1080.jpg'
+    assert yys_phash.preview_url(url, '1920x1080', '横版').endswith('/1/1366x768.jpg')
+    assert yys_phash.preview_url(url, '1440x900', '横版') is None
+
+def test_hamming_distances():
+    hashes = np.array([0, 0b1011, 2**64 - 1], dtype=np.uint64)
+    assert hamming_distances(hashes, 0).tolist() == [0, 3, 64]
+
+def test_search_orders_by_distance(tmp_path):
+    index = PHashIndex(str(tmp_path))
+    index.entries = {'far.jpg': (0, 0b111), 'near.jpg': (0, 0b1), 'same.jpg': (0, 0)}
+    assert index.search(0, max_distance=2) == [
+        (0, str(tmp_path / 'same.jpg')),
+        (1, str(tmp_path / 'near.jpg')),
+    ]
+    index.add(save_image(tmp_path / 'new.jpg', 1), 0b11)
+    assert [distance for distance, _ in index.search(0, max_distance=2)] == [0, 1, 2]
+
+def test_index_save_load_round_trip(tmp_path):
+    kept = save_image(tmp_path / 'kept.jpg', 1)
+    removed = save_image(tmp_path / 'removed.jpg', 2)
+    index = PHashIndex(str(tmp_path))
+    index.add(kept, 2**63 + 5)
+    index.add(removed, 7)
+    (tmp_path / 'removed.jpg').unlink()
+    index.save()
+
+    loaded = PHashIndex.load(str(tmp_path))
+    assert list(loaded.entries) == ['kept.jpg']
+    assert loaded.entries['kept.jpg'][1] == 2**63 + 5
+    # 修改时间未变的图片不会重新计算
+    assert loaded.refresh(max_workers=1) == 0
+
+def test_index_load_ignores_corrupt_file(tmp_path):
+    (tmp_path / yys_phash.INDEX_FILE_NAME).write_text('not json')
+    assert len(PHashIndex.load(str(tmp_path))) == 0
+
+@pytest.mark.parametrize('mode', ['flag', 'skip'])
+def test_check_file_finds_duplicate(tmp_path, mode):
+    original = save_image(tmp_path / 'a.jpg', 1)
+    save_image(tmp_path / 'b.jpg', 2)
+    checker = DuplicateChecker(mode)
+    checker.index = PHashIndex(str(tmp_path))
+    checker.index.add(original, yys_phash.hash_image(original))
+
+    # 同一作品重新编码为其他尺寸后仍视为重复
+    copy = tmp_path / 'copy.png'
+    Image.open(original).resize((128, 72)).save(copy)
+    distance, match = checker.check_file(str(copy))
+    assert match == original
+    assert distance <= checker.max_distance
+    assert (str(copy) in [path for _, path in checker.index.search(0, 64)]) == (mode == 'flag')
+
+    # 不同图片不是重复，且不会与自身比对
+    other = str(tmp_path / 'b.jpg')
+    assert checker.check_file(other) is None
+    assert checker.check_file(other) is None
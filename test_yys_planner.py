@@ -0,0 +1,93 @@
+import json
+
+import yys_planner
+from yys_planner import DownloadPlan, PlanItem, ProgressTracker, SizeCache
+
+def make_plan(fetch_count, skip_count, size=1000):
+    items = [PlanItem(f"u{i}", f"p{i}") for i in range(fetch_count)]
+    items += [PlanItem(f"s{i}", f"q{i}", existing_path=f"q{i}") for i in range(skip_count)]
+    for item in items:
+        item.size = size
+    return DownloadPlan(items)
+
+def test_eta_counts_only_bytes_still_to_fetch():
+    plan = make_plan(10, 90)
+    tracker = ProgressTracker(plan.total_bytes, plan.fetch_bytes)
+    tracker.begin(1000, 'p0')
+    tracker.advance(1000, 'p0')
+    tracker.end('p0')
+    # 固定速度为 1000 字节/秒
+    tracker.start_time -= 1.0
+    assert abs(tracker.eta - 9.0) < 0.1
+    assert tracker.fraction == 0.01
+
+def test_skip_planned_fetch_reduces_remaining_bytes():
+    plan = make_plan(10, 90)
+    tracker = ProgressTracker(plan.total_bytes, plan.fetch_bytes)
+    tracker.skip(1000, plan.will_fetch('s0'))
+    assert tracker.fetched_bytes == 0
+    tracker.skip(1000, plan.will_fetch('u1'))
+    assert tracker.fetched_bytes == 1000
+    assert tracker.done_bytes == 2000
+
+def test_end_fills_missing_bytes_and_ignores_extra():
+    tracker = ProgressTracker(3000)
+    tracker.begin(1000, 'a')
+    tracker.advance(400, 'a')
+    tracker.end('a')
+    assert tracker.done_bytes == 1000
+    tracker.begin(1000, 'b')
+    tracker.advance(1500, 'b')
+    tracker.end('b')
+    assert tracker.done_bytes == 2000
+    assert tracker.transferred_bytes == 1900
+    # 未开始或重复结束的图片不影响统计
+    tracker.end('b')
+    assert tracker.done_bytes == 2000
+
+def test_concurrent_items_are_tracked_separately():
+    tracker = ProgressTracker(2000)
+    tracker.begin(1000, 'a')
+    tracker.begin(1000, 'b')
+    tracker.advance(600, 'a')
+    tracker.advance(300, 'b')
+    tracker.end('a')
+    assert tracker.done_bytes == 1300
+
+def test_clock_starts_at_first_byte():
+    tracker = ProgressTracker(1000)
+    assert tracker.throughput == 0.0
+    assert tracker.eta is None
+    tracker.begin(1000)
+    tracker.advance(100)
+    assert tracker.start_time is not None
+
+def test_size_cache_round_trip(tmp_path):
+    path = tmp_path / 'sizes.json'
+    cache = SizeCache(str(path))
+    cache.put('a', 123)
+    cache.put('b', 0)
+    cache.save()
+    assert json.loads(path.read_text()) == {'a': 123}
+    assert SizeCache(str(path)).get('a') == 123
+
+def test_size_cache_ignores_corrupt_file(tmp_path):
+    path = tmp_path / 'sizes.json'
+    path.write_text('not json')
+    assert SizeCache(str(path)).get('a') is None
+
+def test_plan_uses_local_size_for_existing_files(tmp_path, monkeypatch):
+    existing = tmp_path / 'old.jpg'
+    existing.write_bytes(b'x' * 500)
+    requested = []
+
+    def fake_head_size(url, headers, timeout=10):
+        requested.append(url)
+        return 2000
+
+    monkeypatch.setattr(yys_planner, 'head_size', fake_head_size)
+    items = [PlanItem('old', str(existing), existing_path=str(existing)), PlanItem('new', 'new.jpg')]
+    plan = yys_planner.plan_downloads(items, {}, SizeCache(str(tmp_path / 'sizes.json')))
+    assert requested == ['new']
+    assert plan.total_bytes == 2500
+    assert plan.fetch_bytes == 2000
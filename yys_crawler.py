@@ -0,0 +1,225 @@
+"""多页面抓取：去重的 URL 队列、翻页与相关图集页面跟随、按主机限速的并发抓取
+
+默认只抓取入口页面（与原来的行为相同），通过环境变量扩展:
+    YYS_CRAWL_DEPTH=2         从入口页面跟随链接的最大层数
+    YYS_CRAWL_MAX_PAGES=50    最多抓取的页面数
+    YYS_CRAWL_DELAY=0.5       同一主机两次请求的最小间隔（秒）
+    YYS_CRAWL_WORKERS=4       并发抓取的页面数
+    YYS_CRAWL_URLS=url1,url2  额外的入口页面
+只跟随与某个入口页面同一域名、且位于该入口页面所在目录下的页面链接，并遵守 robots.txt。
+"""
+import os
+import posixpath
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urljoin, urldefrag, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+from bs4 import BeautifulSoup
+
+# 这些扩展名的链接不是页面，不跟随
+NON_PAGE_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.bmp', '.svg', '.ico',
+    '.mp4', '.mp3', '.zip', '.rar', '.7z', '.exe', '.apk', '.pdf', '.css', '.js',
+}
+
+def extract_image_urls(soup, page_url, resolution):
+    """从页面中提取包含指定分辨率的图片地址"""
+    image_urls = set()
+
+    for a in soup.find_all('a'):
+        href = a.get('href')
+        if href and resolution in href:
+            image_urls.add(urljoin(page_url, href))
+
+    for img in soup.find_all('img'):
+        src = img.get('data-src') or img.get('src')
+        if src:
+            full_url = urljoin(page_url, src)
+            if resolution in full_url:
+                image_urls.add(full_url)
+
+    for item in soup.find_all(['div', 'span'], {'data-src': True}):
+        src = item.get('data-src')
+        if src and resolution in src:
+            image_urls.add(urljoin(page_url, src))
+
+    return image_urls
+
+def extract_page_links(soup, page_url):
+    """提取页面中指向其他页面的链接（翻页、相关图集等）"""
+    links = []
+    for a in soup.find_all('a'):
+        href = a.get('href')
+        if not href or href.startswith(('javascript:', 'mailto:', 'tel:')):
+            continue
+        url, _ = urldefrag(urljoin(page_url, href))
+        extension = posixpath.splitext(urlsplit(url).path)[1].lower()
+        if extension in NON_PAGE_EXTENSIONS:
+            continue
+        links.append(url)
+    return links
+
+def seed_scope(url):
+    """入口页面的抓取范围：(域名, 所在目录)，例如 ('yys.163.com', '/media/')"""
+    parts = urlsplit(url)
+    prefix = posixpath.dirname(parts.path or '/')
+    return parts.netloc, prefix.rstrip('/') + '/'
+
+class Frontier:
+    """待抓取页面队列：按层数先进先出，同一地址只入队一次
+
+    scopes 为 (域名, 目录前缀) 的集合，每个入口页面一项，链接落在任一范围内即可跟随。
+    """
+    def __init__(self, scopes):
+        self.scopes = set(scopes)
+        self.queue = deque()
+        self.seen = set()
+
+    def allowed(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            return False
+        path = parts.path or '/'
+        return any(parts.netloc == host and path.startswith(prefix) for host, prefix in self.scopes)
+
+    def add(self, url, depth, seed=False):
+        """加入队列，已见过或不在范围内的地址返回 False；入口页面不受范围限制"""
+        url, _ = urldefrag(url)
+        if url in self.seen or (not seed and not self.allowed(url)):
+            return False
+        self.seen.add(url)
+        self.queue.append((url, depth))
+        return True
+
+    def pop(self):
+        return self.queue.popleft()
+
+    def __len__(self):
+        return len(self.queue)
+
+class HostThrottle:
+    """同一主机两次请求之间至少间隔 delay 秒"""
+    def __init__(self, delay):
+        self.delay = delay
+        self.next_allowed = {}
+        self.lock = threading.Lock()
+
+    def wait(self, host):
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_allowed.get(host, 0.0))
+            self.next_allowed[host] = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+
+class Crawler:
+    """从入口页面出发，并发抓取范围内的页面并收集图片地址"""
+    def __init__(self, start_urls, headers, resolution, max_depth=0, max_pages=50, delay=0.5,
+                 max_workers=4, respect_robots=True, log=None):
+        self.start_urls = list(start_urls)
+        self.headers = headers
+        self.resolution = resolution
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.max_workers = max_workers
+        self.respect_robots = respect_robots
+        self.log = log or (lambda text: None)
+        self.throttle = HostThrottle(delay)
+        self.robots = {}
+        self.robots_lock = threading.Lock()
+
+        # 只跟随各入口页面所在目录下的页面，例如 /media/
+        self.frontier = Frontier(seed_scope(url) for url in self.start_urls)
+
+    @classmethod
+    def from_env(cls, start_url, headers, resolution, log=None):
+        """根据环境变量创建抓取器"""
+        def env_number(name, default, minimum, convert=int):
+            """读取数值型环境变量，无效时使用默认值，过小时取下限"""
+            try:
+                value = convert(os.environ.get(name, default))
+            except ValueError:
+                value = default
+            return max(minimum, value)
+
+        extra = [item.strip() for item in os.environ.get('YYS_CRAWL_URLS', '').split(',') if item.strip()]
+        return cls(
+            [start_url] + extra,
+            headers,
+            resolution,
+            max_depth=env_number('YYS_CRAWL_DEPTH', 0, 0),
+            max_pages=env_number('YYS_CRAWL_MAX_PAGES', 50, 1),
+            delay=env_number('YYS_CRAWL_DELAY', 0.5, 0.0, float),
+            max_workers=env_number('YYS_CRAWL_WORKERS', 4, 1),
+            log=log,
+        )
+
+    def can_fetch(self, url):
+        """检查 robots.txt 是否允许抓取，robots.txt 获取失败时视为允许"""
+        if not self.respect_robots:
+            return True
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        with self.robots_lock:
+            parser = self.robots.get(origin)
+            if parser is None:
+                parser = RobotFileParser()
+                try:
+                    response = requests.get(origin + '/robots.txt', headers=self.headers, timeout=10)
+                    lines = response.text.splitlines() if response.status_code == 200 else []
+                except Exception:
+                    lines = []
+                parser.parse(lines)
+                self.robots[origin] = parser
+        return parser.can_fetch(self.headers.get('User-Agent', '*'), url)
+
+    def fetch(self, url):
+        self.throttle.wait(urlsplit(url).netloc)
+        response = requests.get(url, headers=self.headers, timeout=30)
+        response.raise_for_status()
+        response.encoding = 'utf-8'
+        return BeautifulSoup(response.text, 'html.parser')
+
+    def crawl(self):
+        """抓取所有范围内的页面，返回图片地址集合"""
+        for url in self.start_urls:
+            self.frontier.add(url, 0, seed=True)
+
+        image_urls = set()
+        fetched = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='yys-crawl') as executor:
+            pending = {}
+            while self.frontier or pending:
+                while self.frontier and len(pending) < self.max_workers and fetched + len(pending) < self.max_pages:
+                    url, depth = self.frontier.pop()
+                    # 入口页面与原来一样直接抓取，只对跟随发现的页面检查 robots.txt
+                    if depth > 0 and not self.can_fetch(url):
+                        self.log(f"robots.txt 不允许抓取，跳过: {url}")
+                        continue
+                    pending[executor.submit(self.fetch, url)] = (url, depth)
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth = pending.pop(future)
+                    fetched += 1
+                    try:
+                        soup = future.result()
+                    except Exception as e:
+                        self.log(f"抓取页面失败 {url}: {e}")
+                        continue
+                    found = extract_image_urls(soup, url, self.resolution)
+                    image_urls |= found
+                    added = 0
+                    if depth < self.max_depth:
+                        for link in extract_page_links(soup, url):
+                            if self.frontier.add(link, depth + 1):
+                                added += 1
+                    self.log(f"已抓取页面 ({fetched}): {url} | 图片 {len(found)} 张 | 新链接 {added} 个")
+
+        return image_urls
@@ -0,0 +1,276 @@
+"""多节点下载：镜像配置、测速排序、对冲请求与自动故障转移
+
+镜像通过环境变量 YYS_MIRRORS 配置，多个地址以逗号分隔，例如:
+    YYS_MIRRORS=http://127.0.0.1:8000,https://mirror.example.com/yys
+图片 URL 的路径部分会拼接到镜像地址之后，源站始终作为一个节点参与排序。
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+import requests
+
+MIRRORS_ENV = 'YYS_MIRRORS'
+
+# 评分时假设的单张图片大小，用于把延迟和吞吐折算成预计耗时
+EXPECTED_IMAGE_BYTES = 1024 * 1024
+# 测速时最多读取的字节数
+PROBE_BYTES = 256 * 1024
+# 指数加权平均的新样本权重
+EWMA_ALPHA = 0.3
+# 失败惩罚的半衰期（秒）：恢复后的节点在一段时间内仍排在同速的稳定节点之后
+PENALTY_HALF_LIFE = 300.0
+
+def _close_quietly(future):
+    """关闭落败请求的响应，释放连接"""
+    try:
+        response, _ = future.result()
+        response.close()
+    except Exception:
+        pass
+
+class Endpoint:
+    """单个下载节点及其测速统计"""
+    def __init__(self, base=None):
+        # base 为 None 表示源站，直接使用原始 URL
+        self.base = base.rstrip('/') if base else None
+        self.name = self.base or '源站'
+        self.latency = None
+        self.throughput = None
+        # 连续失败次数，成功一次后清零
+        self.failures = 0
+        self.disabled_until = 0.0
+        # 随时间衰减的失败惩罚
+        self.penalty = 0.0
+        self.penalty_time = 0.0
+
+    def url_for(self, url):
+        """把原始图片 URL 改写为本节点的地址"""
+        if self.base is None:
+            return url
+        parts = urlsplit(url)
+        path = parts.path
+        if parts.query:
+            path += '?' + parts.query
+        return self.base + path
+
+    def current_penalty(self, now=None):
+        """当前的失败惩罚，每经过 PENALTY_HALF_LIFE 秒减半"""
+        if not self.penalty:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        return self.penalty * 0.5 ** ((now - self.penalty_time) / PENALTY_HALF_LIFE)
+
+    def add_penalty(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.penalty = self.current_penalty(now) + 1.0
+        self.penalty_time = now
+
+    def score(self, now=None):
+        """预计下载一张图片的耗时（秒），越小越好；近期失败过的节点按比例加重"""
+        latency = self.latency if self.latency is not None else 0.5
+        if self.throughput:
+            estimate = latency + EXPECTED_IMAGE_BYTES / self.throughput
+        else:
+            estimate = latency + 1.0
+        return estimate * (1 + self.current_penalty(now))
+
+    def rank_key(self, now=None):
+        """排序键：先按是否处于失败状态、是否已测速分组，组内再比较预计耗时
+
+        预计耗时只有在都测过速时才可比，未测速或刚失败的节点不能排在正常节点之前。
+        """
+        return (self.failures > 0, not self.throughput, self.score(now))
+
+    def __repr__(self):
+        return f"Endpoint({self.name!r})"
+
+class EndpointPool:
+    """按测速结果排序节点，对慢首字节发起对冲请求，连续失败的节点暂时下线"""
+    def __init__(self, mirrors=(), include_origin=True, hedge_delay=1.0, min_hedge_delay=0.2,
+                 max_failures=3, cooldown=60.0, max_race=2, transport=None, download_workers=1):
+        self.endpoints = []
+        # 传输层（见 yys_transport），未指定时直接使用 requests
+        self.transport = transport
+        if include_origin:
+            self.endpoints.append(Endpoint())
+        for base in mirrors:
+            self.endpoints.append(Endpoint(base))
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.max_race = max_race
+        self.lock = threading.Lock()
+        # 同时下载 download_workers 张图片时，每张最多占用 max_race 个线程；
+        # 线程不足时对冲请求会在队列中等待，排队时间被误算为首字节延迟而触发多余的对冲
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(2, len(self.endpoints), download_workers * max_race),
+            thread_name_prefix='yys-endpoint'
+        )
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """从环境变量 YYS_MIRRORS 读取镜像列表"""
+        value = os.environ.get(MIRRORS_ENV, '')
+        mirrors = [item.strip() for item in value.split(',') if item.strip()]
+        return cls(mirrors, **kwargs)
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def ranked(self):
+        """返回可用节点，按预计耗时升序；全部下线时返回全部节点"""
+        now = time.monotonic()
+        with self.lock:
+            order = {id(ep): i for i, ep in enumerate(self.endpoints)}
+            healthy = [ep for ep in self.endpoints if ep.disabled_until <= now]
+            if not healthy:
+                healthy = list(self.endpoints)
+            return sorted(healthy, key=lambda ep: (ep.rank_key(now), order[id(ep)]))
+
+    def current_hedge_delay(self, endpoint):
+        """对冲等待时间：最佳节点平均首字节延迟的两倍，未测速时使用默认值"""
+        if endpoint.latency is None:
+            return self.hedge_delay
+        return max(self.min_hedge_delay, min(self.hedge_delay, endpoint.latency * 2))
+
+    def record_latency(self, endpoint, latency):
+        with self.lock:
+            endpoint.failures = 0
+            endpoint.disabled_until = 0.0
+            if endpoint.latency is None:
+                endpoint.latency = latency
+            else:
+                endpoint.latency = EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * endpoint.latency
+
+    def record_transfer(self, endpoint, size, seconds):
+        """记录一次完整传输的吞吐量（字节/秒）"""
+        if size <= 0 or seconds <= 0:
+            return
+        rate = size / seconds
+        with self.lock:
+            if endpoint.throughput is None:
+                endpoint.throughput = rate
+            else:
+                endpoint.throughput = EWMA_ALPHA * rate + (1 - EWMA_ALPHA) * endpoint.throughput
+
+    def record_failure(self, endpoint):
+        """记录失败，连续失败达到上限后暂时移出轮换
+
+        下线期满后连续失败次数不清零，节点排在正常节点之后，再失败一次就重新下线。
+        """
+        with self.lock:
+            now = time.monotonic()
+            endpoint.failures += 1
+            endpoint.add_penalty(now)
+            if endpoint.failures >= self.max_failures:
+                endpoint.disabled_until = now + self.cooldown
+                return True
+        return False
+
+    def _fetch(self, endpoint, url, headers, timeout):
+        start = time.perf_counter()
+        if self.transport:
+            response = self.transport.open(endpoint.url_for(url), headers, timeout)
+        else:
+            response = requests.get(endpoint.url_for(url), headers=headers, timeout=timeout, stream=True)
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+        return response, time.perf_counter() - start
+
+    def open_stream(self, url, headers, timeout=15):
+        """打开图片的流式响应，返回 (response, endpoint)
+
+        先请求最佳节点，首字节超过对冲等待时间仍未返回时再向下一个节点发起请求，
+        先返回的一方胜出；请求失败时立即切换到下一个节点。
+        """
+        ranked = self.ranked()
+        pending = {}
+        next_index = 0
+        last_error = None
+
+        def launch():
+            nonlocal next_index
+            endpoint = ranked[next_index]
+            next_index += 1
+            future = self.executor.submit(self._fetch, endpoint, url, headers, timeout)
+            pending[future] = endpoint
+
+        launch()
+        while pending:
+            can_hedge = next_index < len(ranked) and len(pending) < self.max_race
+            wait_time = self.current_hedge_delay(ranked[0]) if can_hedge else None
+            done, _ = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+
+            winner = None
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    response, latency = future.result()
+                except Exception as e:
+                    last_error = e
+                    self.record_failure(endpoint)
+                    continue
+                if winner is None:
+                    self.record_latency(endpoint, latency)
+                    winner = (response, endpoint)
+                else:
+                    response.close()
+
+            if winner:
+                for future in pending:
+                    future.add_done_callback(_close_quietly)
+                return winner
+
+            if not pending and next_index < len(ranked):
+                launch()
+
+        raise last_error or RuntimeError("没有可用的下载节点")
+
+    def probe(self, sample_url, headers, timeout=10):
+        """并发测速所有节点，返回按预计耗时排序的节点列表"""
+        def probe_one(endpoint):
+            try:
+                response, latency = self._fetch(endpoint, sample_url, headers, timeout)
+            except Exception:
+                self.record_failure(endpoint)
+                return
+            self.record_latency(endpoint, latency)
+            start = time.perf_counter()
+            size = 0
+            try:
+                for chunk in response.iter_content(chunk_size=8192):
+                    size += len(chunk)
+                    if size >= PROBE_BYTES:
+                        break
+            except Exception:
+                self.record_failure(endpoint)
+                return
+            finally:
+                response.close()
+            self.record_transfer(endpoint, size, time.perf_counter() - start)
+
+        futures = [self.executor.submit(probe_one, ep) for ep in self.endpoints]
+        wait(futures)
+        return self.ranked()
+
+    def describe(self):
+        """返回各节点测速结果的文字描述"""
+        lines = []
+        for ep in self.ranked():
+            latency = f"{ep.latency*1000:.0f}ms" if ep.latency is not None else "未知"
+            throughput = f"{ep.throughput/1024:.0f}KB/s" if ep.throughput else "未知"
+            lines.append(f"{ep.name}: 首字节 {latency} | 吞吐 {throughput}")
+        return lines
+
+    def close(self):
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,310 @@
+"""感知哈希索引：识别换了路径重新发布的同一张壁纸
+
+对图库中的每张图片计算 64 位 DCT 感知哈希（pHash），按批在进程池中用 NumPy 计算，
+结果以 “路径 + 修改时间” 为键保存在保存目录（如 横版_1920x1080）的 .yys_phash.json 中，
+只与同一分辨率的图片比较，避免把同一作品的其他分辨率误判为重复。
+查询时把所有哈希存成 uint64 数组，一次异或 + 查表统计位数得到全部汉明距离。
+
+下载前先获取同一张图、同一宽高比的更小分辨率版本作为预览计算哈希，与图库比对；
+没有同比例的更小版本（如 1440x900、640x960、手机壁纸）时，下载完成后直接比对原图：
+    YYS_DEDUP=flag        发现疑似重复时只提示，仍然下载
+    YYS_DEDUP=skip        发现疑似重复时跳过下载
+    YYS_DEDUP_DISTANCE=6  汉明距离不超过该值视为重复
+依赖 NumPy 和 Pillow。
+"""
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+DEDUP_ENV = 'YYS_DEDUP'
+DISTANCE_ENV = 'YYS_DEDUP_DISTANCE'
+DEFAULT_DISTANCE = 6
+
+INDEX_FILE_NAME = '.yys_phash.json'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif')
+SAMPLE_SIZE = 32
+HASH_SIZE = 8
+BATCH_SIZE = 64
+
+# 各分类中可作为下载前预览的小分辨率，每种宽高比取最小的一个（16:9、4:3、9:16）；
+# 官网按宽高比分别裁切，只有同比例的预览才能与原图比对
+PREVIEW_RESOLUTIONS = {
+    '横版': ('1366x768', '2048x1536'),
+    '竖版': ('640x1136',),
+}
+# 宽高比相差不超过 1% 视为同一比例（1366x768 与 1920x1080 略有差异）
+ASPECT_TOLERANCE = 0.01
+
+# 0-255 每个字节中 1 的个数
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def _dct_matrix(n):
+    """n 点 DCT-II 正交变换矩阵"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+DCT_MATRIX = _dct_matrix(SAMPLE_SIZE)
+
+def load_pixels(source):
+    """读取图片（路径或文件对象），缩放为 32x32 灰度数组"""
+    from PIL import Image
+
+    with Image.open(source) as img:
+        img.draft('L', (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+        img = img.convert('L').resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.LANCZOS)
+        return np.asarray(img, dtype=np.float32)
+
+def hash_pixels(batch):
+    """对 (N, 32, 32) 的灰度数组批量计算 pHash，返回 uint64 数组"""
+    coeffs = DCT_MATRIX @ batch @ DCT_MATRIX.T
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(batch), -1)
+    # 直流分量不参与中位数计算
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    bits = np.packbits(low > median, axis=1)
+    return bits.view('>u8').reshape(-1).astype(np.uint64)
+
+def hash_batch(paths):
+    """在子进程中计算一批图片的哈希，返回 [(路径, 哈希或 None)]"""
+    pixels = []
+    loaded = []
+    for path in paths:
+        try:
+            pixels.append(load_pixels(path))
+            loaded.append(path)
+        except Exception:
+            continue
+    result = {path: None for path in paths}
+    if pixels:
+        for path, value in zip(loaded, hash_pixels(np.stack(pixels))):
+            result[path] = int(value)
+    return list(result.items())
+
+def hash_image(source):
+    """计算单张图片（路径或文件对象）的哈希"""
+    return int(hash_pixels(load_pixels(source)[None])[0])
+
+def hamming_distances(hashes, value):
+    """计算 uint64 数组中每个哈希与 value 的汉明距离"""
+    xor = np.bitwise_xor(hashes, np.uint64(value))
+    return POPCOUNT_TABLE[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+def _parse_resolution(resolution):
+    width, height = resolution.split('x')
+    return int(width), int(height)
+
+def preview_resolution(resolution, category):
+    """返回同一宽高比下更小的预览分辨率，没有时返回 None"""
+    try:
+        width, height = _parse_resolution(resolution)
+    except ValueError:
+        return None
+    ratio = width / height
+    best = None
+    for candidate in PREVIEW_RESOLUTIONS.get(category, ()):
+        cw, ch = _parse_resolution(candidate)
+        if cw * ch >= width * height or abs(cw / ch - ratio) > ratio * ASPECT_TOLERANCE:
+            continue
+        if best is None or cw * ch < best[0]:
+            best = (cw * ch, candidate)
+    return best[1] if best else None
+
+def preview_url(img_url, resolution, category):
+    """返回同一张图同比例预览版本的地址，没有时返回 None"""
+    preview = preview_resolution(resolution, category)
+    if not preview or resolution not in img_url:
+        return None
+    return img_url.replace(resolution, preview)
+
+class PHashIndex:
+    """图库感知哈希索引"""
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, INDEX_FILE_NAME)
+        self.entries = {}
+        self._paths = None
+        self._hashes = None
+
+    @classmethod
+    def load(cls, root):
+        index = cls(root)
+        try:
+            with open(index.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            index.entries = {path: (mtime, int(value, 16)) for path, (mtime, value) in data.items()}
+        except (OSError, ValueError, TypeError):
+            index.entries = {}
+        return index
+
+    def save(self):
+        """保存索引，同时丢弃已被删除的文件"""
+        data = {}
+        for rel_path, (mtime, value) in self.entries.items():
+            if os.path.exists(os.path.join(self.root, rel_path)):
+                data[rel_path] = [mtime, f"{value:016x}"]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _invalidate(self):
+        self._paths = None
+        self._hashes = None
+
+    def refresh(self, max_workers=None, callback=None):
+        """扫描图库，为新增或修改过的图片计算哈希，返回新计算的数量"""
+        stale = []
+        seen = set()
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, name)
+                rel_path = os.path.relpath(path, self.root)
+                seen.add(rel_path)
+                try:
+                    mtime = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                entry = self.entries.get(rel_path)
+                if entry is None or entry[0] != mtime:
+                    stale.append((path, rel_path, mtime))
+
+        for rel_path in list(self.entries):
+            if rel_path not in seen:
+                del self.entries[rel_path]
+        self._invalidate()
+        if not stale:
+            return 0
+
+        from concurrent.futures import ProcessPoolExecutor
+
+        batches = [stale[i:i + BATCH_SIZE] for i in range(0, len(stale), BATCH_SIZE)]
+        count = 0
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(hash_batch, [[path for path, _, _ in batch] for batch in batches])
+            for batch, hashed in zip(batches, results):
+                values = dict(hashed)
+                for path, rel_path, mtime in batch:
+                    if values.get(path) is not None:
+                        self.entries[rel_path] = (mtime, values[path])
+                        count += 1
+                if callback:
+                    callback(count, len(stale))
+        self._invalidate()
+        return count
+
+    def add(self, path, value):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        self.entries[os.path.relpath(path, self.root)] = (mtime, value)
+        self._invalidate()
+
+    def search(self, value, max_distance=DEFAULT_DISTANCE):
+        """返回汉明距离不超过 max_distance 的 [(距离, 路径)]，按距离升序"""
+        if not self.entries:
+            return []
+        if self._hashes is None:
+            self._paths = list(self.entries)
+            self._hashes = np.array([self.entries[p][1] for p in self._paths], dtype=np.uint64)
+        distances = hamming_distances(self._hashes, value)
+        matches = np.nonzero(distances <= max_distance)[0]
+        order = matches[np.argsort(distances[matches], kind='stable')]
+        return [(int(distances[i]), os.path.join(self.root, self._paths[i])) for i in order]
+
+class DuplicateChecker:
+    """通过预览图（下载前）或原图（下载后）判断是否为图库中已有的图片"""
+    def __init__(self, mode, max_distance=DEFAULT_DISTANCE):
+        self.mode = mode
+        self.max_distance = max_distance
+        self.index = None
+        # 并发下载时多个线程同时查询和更新索引
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量创建，未启用时返回 None"""
+        mode = os.environ.get(DEDUP_ENV, '').strip().lower()
+        if mode not in ('flag', 'skip'):
+            return None
+        try:
+            max_distance = int(os.environ.get(DISTANCE_ENV, DEFAULT_DISTANCE))
+        except ValueError:
+            max_distance = DEFAULT_DISTANCE
+        return cls(mode, max_distance)
+
+    @property
+    def skip(self):
+        return self.mode == 'skip'
+
+    def open(self, root, callback=None):
+        """加载并更新图库索引，返回新计算的哈希数量"""
+        self.index = PHashIndex.load(root)
+        return self.index.refresh(callback=callback)
+
+    def check(self, img_url, resolution, category, headers, timeout=15):
+        """获取预览图并查找相似图片，返回 (距离, 路径) 或 None"""
+        url = preview_url(img_url, resolution, category)
+        if not url or self.index is None:
+            return None
+        import requests
+        try:
+            response = requests.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            value = hash_image(io.BytesIO(response.content))
+        except Exception:
+            return None
+        with self.lock:
+            matches = self.index.search(value, self.max_distance)
+        return matches[0] if matches else None
+
+    def can_precheck(self, img_url, resolution, category):
+        """是否可以在下载前用预览图比对"""
+        return preview_url(img_url, resolution, category) is not None
+
+    def check_file(self, path):
+        """比对已下载的原图，返回 (距离, 路径) 或 None
+
+        skip 模式下发现重复时不加入索引，由调用方删除文件；其余情况加入索引。
+        """
+        if self.index is None:
+            return None
+        try:
+            value = hash_image(path)
+        except Exception:
+            return None
+        target = os.path.abspath(path)
+        # 查询与加入索引在同一把锁内，同时下载的两张重复图片也能被发现
+        with self.lock:
+            matches = [(distance, match) for distance, match in self.index.search(value, self.max_distance)
+                       if os.path.abspath(match) != target]
+            if not (matches and self.skip):
+                self.index.add(path, value)
+        return matches[0] if matches else None
+
+    def add_file(self, path):
+        if self.index is None:
+            return
+        try:
+            value = hash_image(path)
+        except Exception:
+            return
+        with self.lock:
+            self.index.add(path, value)
+
+    def close(self):
+        if self.index is not None:
+            try:
+                self.index.save()
+            except OSError:
+                pass
@@ -0,0 +1,262 @@
+"""下载计划：并发 HEAD 请求统计总字节数，按字节计算总进度、速度与剩余时间
+
+图片地址带有日期和序号，内容不会变化，因此获取到的文件大小缓存在
+~/.cache/yys_down_image/sizes.json，下次运行直接复用，不再发送 HEAD 请求。
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_SIZE_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'yys_down_image', 'sizes.json')
+
+def format_bytes(size):
+    """把字节数格式化为易读的字符串"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.1f}{unit}" if unit != 'B' else f"{int(size)}B"
+        size /= 1024
+    return f"{size:.2f}GB"
+
+def format_eta(seconds):
+    """把秒数格式化为 时:分:秒"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+class SizeCache:
+    """URL -> 文件字节数的持久化缓存"""
+    def __init__(self, path=DEFAULT_SIZE_CACHE):
+        self.path = path
+        self.sizes = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.sizes = json.load(f)
+        except (OSError, ValueError):
+            self.sizes = {}
+
+    def get(self, url):
+        with self.lock:
+            return self.sizes.get(url)
+
+    def put(self, url, size):
+        if size <= 0:
+            return
+        with self.lock:
+            if self.sizes.get(url) != size:
+                self.sizes[url] = size
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data = dict(self.sizes)
+            self.dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+class PlanItem:
+    """计划中的单张图片"""
+    def __init__(self, url, save_path, existing_path=None):
+        self.url = url
+        self.save_path = save_path
+        self.existing_path = existing_path
+        self.size = None
+        self.estimated = False
+
+    @property
+    def skip(self):
+        return self.existing_path is not None
+
+class DownloadPlan:
+    """所有待处理图片及其字节数"""
+    def __init__(self, items):
+        self.items = items
+        self.by_url = {item.url: item for item in items}
+
+    def size_of(self, url):
+        item = self.by_url.get(url)
+        return item.size if item and item.size else 0
+
+    def will_fetch(self, url):
+        """规划时该图片是否计入需要下载的字节数"""
+        item = self.by_url.get(url)
+        return item is not None and not item.skip
+
+    @property
+    def total_bytes(self):
+        return sum(item.size or 0 for item in self.items)
+
+    @property
+    def fetch_items(self):
+        return [item for item in self.items if not item.skip]
+
+    @property
+    def fetch_bytes(self):
+        return sum(item.size or 0 for item in self.fetch_items)
+
+    def report(self):
+        """返回预估报告的文字描述（用于仅预估模式）"""
+        fetch = self.fetch_items
+        estimated = sum(1 for item in fetch if item.estimated)
+        lines = [
+            f"共 {len(self.items)} 张图片，{format_bytes(self.total_bytes)}",
+            f"已存在 {len(self.items) - len(fetch)} 张，将跳过",
+            f"需要下载 {len(fetch)} 张，约 {format_bytes(self.fetch_bytes)}",
+        ]
+        if estimated:
+            lines.append(f"其中 {estimated} 张未能获取大小，按平均大小估算")
+        return lines
+
+def head_size(url, headers, timeout=10):
+    """发送 HEAD 请求获取文件大小，获取失败返回 None"""
+    try:
+        response = requests.head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        response.raise_for_status()
+        size = int(response.headers.get('content-length', 0))
+    except Exception:
+        return None
+    return size or None
+
+def plan_downloads(items, headers, size_cache=None, max_workers=8):
+    """并发获取所有图片的大小，优先使用缓存，返回 DownloadPlan
+
+    items 为 PlanItem 列表；已存在的图片直接使用本地文件大小，只对需要下载的图片发送 HEAD 请求；
+    无法获取大小的图片按已知大小的平均值估算。
+    """
+    pending = []
+    for item in items:
+        if item.skip:
+            try:
+                item.size = os.path.getsize(item.existing_path)
+            except OSError:
+                pass
+            continue
+        cached = size_cache.get(item.url) if size_cache else None
+        if cached:
+            item.size = cached
+        else:
+            pending.append(item)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='yys-plan') as executor:
+            sizes = executor.map(lambda item: head_size(item.url, headers), pending)
+            for item, size in zip(pending, sizes):
+                if size:
+                    item.size = size
+                    if size_cache:
+                        size_cache.put(item.url, size)
+
+    known = [item.size for item in items if item.size]
+    average = sum(known) // len(known) if known else 0
+    for item in items:
+        if not item.size:
+            item.size = average
+            item.estimated = True
+
+    if size_cache:
+        size_cache.save()
+    return DownloadPlan(items)
+
+class ProgressTracker:
+    """按字节统计总进度，计算平均速度与剩余时间
+
+    总进度按全部图片（含已存在跳过的）的字节数计算，剩余时间只按还需下载的字节数计算。
+    """
+    def __init__(self, total_bytes, fetch_bytes=None):
+        self.total_bytes = total_bytes
+        self.fetch_bytes = total_bytes if fetch_bytes is None else fetch_bytes
+        self.done_bytes = 0
+        # 计划下载的图片中已处理完的字节数
+        self.fetched_bytes = 0
+        self.transferred_bytes = 0
+        # 收到第一块数据时才开始计时，测速、建立索引等准备时间不计入速度
+        self.start_time = None
+        # 正在下载的图片: key -> [预计字节数, 已收到字节数]，并发下载时以保存路径区分
+        self.active = {}
+        self.lock = threading.Lock()
+
+    def begin(self, expected, key=None):
+        """开始下载一张预计 expected 字节的图片"""
+        with self.lock:
+            self.active[key] = [expected, 0]
+
+    def advance(self, size, key=None):
+        """收到 size 字节数据；超出预计大小的部分不计入总进度"""
+        with self.lock:
+            if self.start_time is None:
+                self.start_time = time.monotonic()
+            self.transferred_bytes += size
+            item = self.active.get(key)
+            if item is None:
+                return
+            counted = min(size, max(0, item[0] - item[1]))
+            item[1] += size
+            self.done_bytes += counted
+            self.fetched_bytes += counted
+
+    def end(self, key=None):
+        """图片处理结束（成功或失败），补齐其预计字节数"""
+        with self.lock:
+            item = self.active.pop(key, None)
+            if item is None:
+                return
+            rest = max(0, item[0] - item[1])
+            self.done_bytes += rest
+            self.fetched_bytes += rest
+
+    def skip(self, expected, planned_fetch=False):
+        """跳过的图片直接计入已完成，但不影响速度统计
+
+        planned_fetch 为 True 表示该图片原本计划下载（如去重跳过），同时从剩余待下载字节中扣除。
+        """
+        with self.lock:
+            self.done_bytes += expected
+            if planned_fetch:
+                self.fetched_bytes += expected
+
+    @property
+    def fraction(self):
+        if self.total_bytes <= 0:
+            return 0.0
+        return min(1.0, self.done_bytes / self.total_bytes)
+
+    @property
+    def throughput(self):
+        """平均速度（字节/秒）"""
+        if self.start_time is None:
+            return 0.0
+        elapsed = time.monotonic() - self.start_time
+        if elapsed <= 0 or self.transferred_bytes <= 0:
+            return 0.0
+        return self.transferred_bytes / elapsed
+
+    @property
+    def eta(self):
+        """剩余时间（秒），尚无速度数据时返回 None"""
+        rate = self.throughput
+        if rate <= 0:
+            return None
+        return max(0, self.fetch_bytes - self.fetched_bytes) / rate
+
+    def describe(self):
+        return (f"总进度 {self.fraction*100:.1f}% "
+                f"({format_bytes(self.done_bytes)}/{format_bytes(self.total_bytes)}) | "
+                f"速度 {format_bytes(self.throughput)}/s | 剩余 {format_eta(self.eta)}")
@@ -0,0 +1,384 @@
+"""缩略图预览：进程池解码、磁盘 + 内存 LRU 缓存与虚拟化的缩略图画廊
+
+缩略图以 “路径 + 修改时间 + 尺寸” 为键缓存到磁盘（PNG），
+界面只为可见行创建图像，滚动 10,000 张以上的图片也能保持流畅。
+解码依赖 Pillow（可选），未安装时画廊只显示文件名。
+"""
+import hashlib
+import importlib.util
+import os
+import threading
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import ttk
+
+THUMB_SIZE = (160, 90)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif')
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'yys_down_image', 'thumbnails')
+# 磁盘缓存上限，超过后按最近使用时间淘汰
+MAX_DISK_BYTES = 200 * 1024 * 1024
+
+def make_thumbnail(src_path, dst_path, size):
+    """在子进程中解码图片并生成 PNG 缩略图"""
+    from PIL import Image
+
+    with Image.open(src_path) as img:
+        # JPEG 可以直接按缩小比例解码，速度远快于完整解码
+        img.draft('RGB', size)
+        img = img.convert('RGB')
+        img.thumbnail(size)
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        tmp_path = dst_path + '.tmp'
+        img.save(tmp_path, 'PNG')
+    os.replace(tmp_path, dst_path)
+    return dst_path
+
+def has_pillow():
+    return importlib.util.find_spec('PIL') is not None
+
+class LRUCache:
+    """固定容量的最近最少使用缓存"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.capacity:
+            self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+class ThumbnailCache:
+    """缩略图磁盘缓存 + 内存中的 PhotoImage LRU 缓存"""
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, size=THUMB_SIZE, memory_items=600,
+                 max_disk_bytes=MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.size = size
+        self.memory = LRUCache(memory_items)
+        self.max_disk_bytes = max_disk_bytes
+
+    def key_for(self, path):
+        """返回缓存键，文件不存在时返回 None"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(path)}|{mtime}|{self.size[0]}x{self.size[1]}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.png')
+
+    def load(self, key):
+        """从内存或磁盘缓存读取 PhotoImage，未命中返回 None；只能在主线程调用"""
+        image = self.memory.get(key)
+        if image is not None:
+            return image
+        disk_path = self.disk_path(key)
+        if not os.path.exists(disk_path):
+            return None
+        try:
+            image = tk.PhotoImage(file=disk_path)
+            # 更新访问时间，供磁盘缓存按最近使用淘汰
+            os.utime(disk_path)
+        except (tk.TclError, OSError):
+            return None
+        self.memory.put(key, image)
+        return image
+
+    def prune(self):
+        """磁盘缓存超过上限时删除最久未使用的缩略图"""
+        entries = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        if total <= self.max_disk_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+class ThumbnailLoader:
+    """在进程池中生成缩略图，完成后在回调线程中调用 on_ready(key)"""
+    def __init__(self, cache, on_ready, max_workers=None):
+        self.cache = cache
+        self.on_ready = on_ready
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.executor = None
+        self.inflight = {}
+        self.failed = set()
+        self.closed = False
+        self.lock = threading.Lock()
+
+    def request(self, path, key):
+        with self.lock:
+            # 关闭后不再创建新的进程池
+            if self.closed or key in self.inflight or key in self.failed:
+                return
+            if self.executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            future = self.executor.submit(make_thumbnail, path, self.cache.disk_path(key), self.cache.size)
+            self.inflight[key] = future
+        future.add_done_callback(lambda f, k=key: self._done(k, f))
+
+    def _done(self, key, future):
+        with self.lock:
+            self.inflight.pop(key, None)
+            # 关闭后窗口可能已销毁，仍在运行的任务完成时不再通知
+            if self.closed or future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed.add(key)
+                return
+        self.on_ready(key)
+
+    def retain(self, keys):
+        """取消尚未开始、且已经滚出可见区域的任务"""
+        with self.lock:
+            stale = [future for key, future in self.inflight.items() if key not in keys]
+        for future in stale:
+            future.cancel()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            executor = self.executor
+            self.executor = None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+class ThumbnailGallery(ttk.Frame):
+    """只绘制可见行的缩略图画廊"""
+    PAD = 6
+    LABEL_HEIGHT = 16
+    PREFETCH_ROWS = 2
+
+    def __init__(self, master, cache=None):
+        super().__init__(master)
+        self.cache = cache or ThumbnailCache()
+        self.loader = ThumbnailLoader(self.cache, self._on_thumbnail_ready)
+        self.pillow_available = has_pillow()
+        self.paths = []
+        self.path_set = set()
+        self.unsorted = False
+        self.keys = {}
+        self.offset = 0
+        self.redraw_pending = False
+        self.scan_token = 0
+        self.directory = None
+
+        self.cell_width = self.cache.size[0] + self.PAD * 2
+        self.cell_height = self.cache.size[1] + self.LABEL_HEIGHT + self.PAD * 2
+
+        self.info_var = tk.StringVar(value="暂无图片")
+        self.info_label = ttk.Label(self, textvariable=self.info_var)
+        self.info_label.pack(fill=tk.X)
+
+        body = ttk.Frame(self)
+        body.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(body, highlightthickness=0, background='#f4f4f4')
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(body, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 在后台清理超出上限的磁盘缓存
+        prune_thread = threading.Thread(target=self.cache.prune, name="thumbnail-prune")
+        prune_thread.daemon = True
+        prune_thread.start()
+
+        self.canvas.bind('<Configure>', lambda e: self.schedule_redraw())
+        self.canvas.bind('<Enter>', self._bind_wheel)
+        self.canvas.bind('<Leave>', self._unbind_wheel)
+
+    def _bind_wheel(self, event):
+        self.canvas.bind_all('<MouseWheel>', self._on_wheel)
+        self.canvas.bind_all('<Button-4>', self._on_wheel)
+        self.canvas.bind_all('<Button-5>', self._on_wheel)
+
+    def _unbind_wheel(self, event):
+        self.canvas.unbind_all('<MouseWheel>')
+        self.canvas.unbind_all('<Button-4>')
+        self.canvas.unbind_all('<Button-5>')
+
+    def _on_wheel(self, event):
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_by(-self.cell_height // 2)
+        else:
+            self.scroll_by(self.cell_height // 2)
+
+    def columns(self):
+        return max(1, self.canvas.winfo_width() // self.cell_width)
+
+    def total_height(self):
+        rows = (len(self.paths) + self.columns() - 1) // self.columns()
+        return rows * self.cell_height
+
+    def max_offset(self):
+        return max(0, self.total_height() - self.canvas.winfo_height())
+
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self.max_offset()))
+        if offset != self.offset:
+            self.offset = offset
+            self.schedule_redraw()
+
+    def scroll_by(self, delta):
+        self.scroll_to(self.offset + delta)
+
+    def yview(self, *args):
+        """滚动条回调"""
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * self.total_height())
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                self.scroll_by(amount * self.canvas.winfo_height())
+            else:
+                self.scroll_by(amount * self.cell_height)
+
+    def set_directory(self, directory):
+        """在后台线程中扫描目录（含子目录）并显示其中的图片"""
+        self.directory = os.path.normpath(directory)
+        self.scan_token += 1
+        token = self.scan_token
+
+        def scan():
+            found = []
+            for dirpath, _, filenames in os.walk(directory):
+                for name in filenames:
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        found.append(os.path.join(dirpath, name))
+            self.after(0, lambda: self._apply_scan(token, found))
+
+        thread = threading.Thread(target=scan, name="gallery-scan")
+        thread.daemon = True
+        thread.start()
+
+    def _apply_scan(self, token, found):
+        if token == self.scan_token:
+            self.set_paths(found)
+
+    def set_paths(self, paths):
+        self.paths = list(paths)
+        self.path_set = set(self.paths)
+        self.keys.clear()
+        self.offset = 0
+        self.unsorted = True
+        self.schedule_redraw()
+
+    def add_image(self, path):
+        """新图片下载完成时调用，实时加入画廊"""
+        if path in self.path_set:
+            # 文件被覆盖时修改时间改变，需要重新计算缓存键
+            self.keys.pop(path, None)
+        else:
+            self.paths.append(path)
+            self.path_set.add(path)
+            self.unsorted = True
+        self.schedule_redraw()
+
+    def remove_image(self, path):
+        """文件被删除（例如转码后丢弃原图）时从画廊移除"""
+        if path in self.path_set:
+            self.path_set.discard(path)
+            self.paths.remove(path)
+            self.keys.pop(path, None)
+            self.schedule_redraw()
+
+    def schedule_redraw(self):
+        if not self.redraw_pending:
+            self.redraw_pending = True
+            self.after_idle(self.redraw)
+
+    def _on_thumbnail_ready(self, key):
+        # 在进程池回调线程中执行，转交主线程重绘
+        self.after(0, self.schedule_redraw)
+
+    def _key(self, path):
+        key = self.keys.get(path)
+        if key is None:
+            key = self.cache.key_for(path)
+            if key is not None:
+                self.keys[path] = key
+        return key
+
+    def redraw(self):
+        self.redraw_pending = False
+        if self.unsorted:
+            # 文件名以日期开头，降序排列即最新的图片在前
+            self.paths.sort(key=os.path.basename, reverse=True)
+            self.unsorted = False
+
+        canvas = self.canvas
+        canvas.delete('cell')
+        height = canvas.winfo_height()
+        columns = self.columns()
+        total = self.total_height()
+        self.offset = max(0, min(self.offset, self.max_offset()))
+
+        count = len(self.paths)
+        if self.pillow_available:
+            self.info_var.set(f"共 {count} 张图片")
+        else:
+            self.info_var.set(f"共 {count} 张图片（未安装 Pillow，仅显示文件名）")
+
+        if total > 0:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + height) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+        first_row = self.offset // self.cell_height
+        last_row = (self.offset + height) // self.cell_height
+        wanted = set()
+        prefetch_end = min(count, (last_row + 1 + self.PREFETCH_ROWS) * columns)
+        for index in range(first_row * columns, prefetch_end):
+            path = self.paths[index]
+            key = self._key(path)
+            row, col = divmod(index, columns)
+            visible = row <= last_row
+            image = self.cache.load(key) if key and self.pillow_available else None
+            if image is None and key and self.pillow_available:
+                wanted.add(key)
+                self.loader.request(path, key)
+            if not visible:
+                continue
+
+            x = col * self.cell_width + self.PAD
+            y = row * self.cell_height - self.offset + self.PAD
+            thumb_w, thumb_h = self.cache.size
+            if image is not None:
+                canvas.create_image(x + thumb_w // 2, y + thumb_h // 2, image=image, tags='cell')
+            else:
+                canvas.create_rectangle(x, y, x + thumb_w, y + thumb_h, outline='#cccccc', fill='#e8e8e8', tags='cell')
+            name = os.path.basename(path)
+            if len(name) > 24:
+                name = name[:21] + '...'
+            canvas.create_text(x + thumb_w // 2, y + thumb_h + self.LABEL_HEIGHT // 2 + 2,
+                               text=name, font=('TkDefaultFont', 8), width=self.cell_width - 4, tags='cell')
+        self.loader.retain(wanted)
+
+    def close(self):
+        self.loader.close()
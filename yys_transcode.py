@@ -0,0 +1,136 @@
+"""转码存储模式：下载完成的图片在进程池中转为 WebP/AVIF 以节省磁盘
+
+通过环境变量启用:
+    YYS_TRANSCODE=webp          目标格式（webp 或 avif），不设置则不转码
+    YYS_TRANSCODE_QUALITY=80    压缩质量（1-100）
+    YYS_KEEP_ORIGINAL=1         保留原始 JPEG，默认转码成功后删除
+转码依赖 Pillow；AVIF 需要 Pillow 自带 AVIF 支持或安装 pillow-avif-plugin。
+"""
+import os
+import threading
+
+TRANSCODE_ENV = 'YYS_TRANSCODE'
+QUALITY_ENV = 'YYS_TRANSCODE_QUALITY'
+KEEP_ORIGINAL_ENV = 'YYS_KEEP_ORIGINAL'
+
+FORMAT_EXTENSIONS = {
+    'webp': '.webp',
+    'avif': '.avif',
+}
+DEFAULT_QUALITY = 80
+
+def transcoded_path(path, fmt):
+    """返回转码后的文件路径：替换扩展名"""
+    return os.path.splitext(path)[0] + FORMAT_EXTENSIONS[fmt]
+
+def existing_image_path(path):
+    """原图或任一格式的转码文件已存在时返回其路径，否则返回 None
+
+    与当前是否开启转码、选择哪种格式无关，避免关闭或切换转码后重新下载整个图库。
+    """
+    for fmt in FORMAT_EXTENSIONS:
+        candidate = transcoded_path(path, fmt)
+        if os.path.exists(candidate):
+            return candidate
+    return path if os.path.exists(path) else None
+
+def transcode_image(src_path, fmt, quality, keep_original):
+    """在子进程中转码单张图片，返回 (目标路径, 原始大小, 转码后大小)"""
+    from PIL import Image
+    if fmt == 'avif':
+        try:
+            import pillow_avif  # noqa: F401  旧版 Pillow 通过插件注册 AVIF
+        except ImportError:
+            pass
+
+    dst_path = transcoded_path(src_path, fmt)
+    tmp_path = dst_path + '.tmp'
+    try:
+        with Image.open(src_path) as img:
+            img.save(tmp_path, fmt.upper(), quality=quality)
+        os.replace(tmp_path, dst_path)
+    except Exception:
+        # 保存失败时不留下不完整的临时文件
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    src_size = os.path.getsize(src_path)
+    dst_size = os.path.getsize(dst_path)
+    if not keep_original:
+        os.remove(src_path)
+    return dst_path, src_size, dst_size
+
+class Transcoder:
+    """管理转码进程池，与网络下载并行运行"""
+    def __init__(self, fmt='webp', quality=DEFAULT_QUALITY, keep_original=False, max_workers=None):
+        if fmt not in FORMAT_EXTENSIONS:
+            raise ValueError(f"不支持的转码格式: {fmt}")
+        self.fmt = fmt
+        self.quality = quality
+        self.keep_original = keep_original
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.executor = None
+        self.lock = threading.Lock()
+        self.count = 0
+        self.failed = 0
+        self.original_bytes = 0
+        self.transcoded_bytes = 0
+
+    @classmethod
+    def from_env(cls, log=None):
+        """根据环境变量创建转码器，未启用或格式无效时返回 None"""
+        fmt = os.environ.get(TRANSCODE_ENV, '').strip().lower()
+        if not fmt:
+            return None
+        if fmt not in FORMAT_EXTENSIONS:
+            if log:
+                log(f"不支持的转码格式 {fmt}（可选 {'/'.join(FORMAT_EXTENSIONS)}），不转码")
+            return None
+        try:
+            quality = int(os.environ.get(QUALITY_ENV, DEFAULT_QUALITY))
+        except ValueError:
+            quality = DEFAULT_QUALITY
+        keep_original = os.environ.get(KEEP_ORIGINAL_ENV, '').strip() in ('1', 'true', 'yes')
+        return cls(fmt, max(1, min(quality, 100)), keep_original)
+
+    def submit(self, path, callback=None):
+        """提交转码任务，完成后调用 callback(原始路径, 目标路径, 错误)"""
+        with self.lock:
+            if self.executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            future = self.executor.submit(transcode_image, path, self.fmt, self.quality, self.keep_original)
+
+        def done(f):
+            error = f.exception()
+            dst_path = None
+            with self.lock:
+                if error is None:
+                    dst_path, src_size, dst_size = f.result()
+                    self.count += 1
+                    self.original_bytes += src_size
+                    self.transcoded_bytes += dst_size
+                else:
+                    self.failed += 1
+            if callback:
+                callback(path, dst_path, error)
+
+        future.add_done_callback(done)
+        return future
+
+    def summary(self):
+        """返回转码统计的文字描述"""
+        saved = self.original_bytes - self.transcoded_bytes
+        ratio = (saved / self.original_bytes * 100) if self.original_bytes else 0
+        return (f"转码 {self.count} 张为 {self.fmt.upper()}（失败 {self.failed} 张）: "
+                f"{self.original_bytes/1024/1024:.1f}MB -> {self.transcoded_bytes/1024/1024:.1f}MB，"
+                f"节省 {ratio:.0f}%")
+
+    def close(self, wait=True):
+        """等待所有转码任务完成并关闭进程池"""
+        with self.lock:
+            executor = self.executor
+            self.executor = None
+        if executor:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,123 @@
+"""图片下载的传输层：连接池化的 HTTP/1.1（requests）与可选的 HTTP/2（httpx）
+
+通过环境变量选择:
+    YYS_TRANSPORT=http1        默认，requests 连接池
+    YYS_TRANSPORT=http2        HTTP/2，多个图片流复用同一个连接
+    YYS_HTTP2_PRIOR_KNOWLEDGE=1  对 http:// 地址直接使用 HTTP/2（h2c），用于本地测试服务器
+    YYS_DOWNLOAD_WORKERS=4     同时下载的图片数，默认 1（逐张下载）；
+                               大于 1 时 HTTP/2 的多个图片流才会复用同一个连接
+HTTP/2 依赖 `pip install httpx[http2]`，未安装时自动使用 HTTP/1.1；
+HTTPS 通过 ALPN 协商，服务器不支持 HTTP/2 时同样回落到 HTTP/1.1，
+HTTP/2 协议层出错的主机此后改用 HTTP/1.1；连接失败不回落，由多节点下载切换到下一个节点。
+"""
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TRANSPORT_ENV = 'YYS_TRANSPORT'
+PRIOR_KNOWLEDGE_ENV = 'YYS_HTTP2_PRIOR_KNOWLEDGE'
+WORKERS_ENV = 'YYS_DOWNLOAD_WORKERS'
+DEFAULT_POOL_SIZE = 10
+
+class RequestsTransport:
+    """基于 requests.Session 的 HTTP/1.1 传输，同一主机复用连接"""
+    name = 'HTTP/1.1'
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def open(self, url, headers, timeout=15):
+        """发起流式 GET 请求，返回带 headers / iter_content / raise_for_status / close 的响应"""
+        return self.session.get(url, headers=headers, timeout=timeout, stream=True)
+
+    def close(self):
+        self.session.close()
+
+class HTTPXResponse:
+    """把 httpx 的流式响应包装成与 requests.Response 相同的用法"""
+    def __init__(self, response):
+        self.response = response
+        self.headers = response.headers
+        self.status_code = response.status_code
+        self.http_version = response.http_version
+
+    def raise_for_status(self):
+        try:
+            self.response.raise_for_status()
+        except Exception:
+            self.close()
+            raise
+
+    def iter_content(self, chunk_size=8192):
+        return self.response.iter_bytes(chunk_size)
+
+    def close(self):
+        self.response.close()
+
+class HTTP2Transport:
+    """基于 httpx 的 HTTP/2 传输，多个请求复用同一个连接；协议层出错时回落到 HTTP/1.1"""
+    name = 'HTTP/2'
+
+    def __init__(self, prior_knowledge=False, max_connections=DEFAULT_POOL_SIZE, fallback=None, log=None):
+        import httpx
+
+        self.httpx = httpx
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        # prior_knowledge 时不再协商，直接以 HTTP/2 连接（h2c）；与 requests 一样跟随 CDN 重定向
+        self.client = httpx.Client(http1=not prior_knowledge, http2=True, limits=limits, follow_redirects=True)
+        self.fallback = fallback or RequestsTransport(max_connections)
+        self.fallback_hosts = set()
+        self.lock = threading.Lock()
+        self.log = log or (lambda text: None)
+
+    def open(self, url, headers, timeout=15):
+        host = urlsplit(url).netloc
+        with self.lock:
+            use_fallback = host in self.fallback_hosts
+        if use_fallback:
+            return self.fallback.open(url, headers, timeout)
+
+        try:
+            request = self.client.build_request('GET', url, headers=headers, timeout=timeout)
+            return HTTPXResponse(self.client.send(request, stream=True))
+        # 只有协议层错误说明该主机不支持 HTTP/2；连接失败（拒绝连接、超时等）交给调用方切换节点，
+        # 否则一次网络抖动就会让该主机之后一直使用 HTTP/1.1
+        except (self.httpx.RemoteProtocolError, self.httpx.LocalProtocolError) as e:
+            with self.lock:
+                self.fallback_hosts.add(host)
+            self.log(f"HTTP/2 连接失败，{host} 改用 HTTP/1.1: {e}")
+            return self.fallback.open(url, headers, timeout)
+
+    def close(self):
+        self.client.close()
+        self.fallback.close()
+
+def create_transport(name='http1', prior_knowledge=False, log=None):
+    """创建传输层，HTTP/2 不可用时返回 HTTP/1.1 传输"""
+    if name == 'http2':
+        try:
+            return HTTP2Transport(prior_knowledge=prior_knowledge, log=log)
+        except ImportError:
+            if log:
+                log("未安装 httpx[http2]，使用 HTTP/1.1")
+    return RequestsTransport()
+
+def transport_from_env(log=None):
+    """根据环境变量 YYS_TRANSPORT 创建传输层"""
+    name = os.environ.get(TRANSPORT_ENV, 'http1').strip().lower()
+    prior_knowledge = os.environ.get(PRIOR_KNOWLEDGE_ENV, '').strip() in ('1', 'true', 'yes')
+    return create_transport(name, prior_knowledge, log)
+
+def download_workers_from_env():
+    """根据环境变量 YYS_DOWNLOAD_WORKERS 返回同时下载的图片数，最多与连接池大小相同"""
+    try:
+        workers = int(os.environ.get(WORKERS_ENV, 1))
+    except ValueError:
+        workers = 1
+    return max(1, min(workers, DEFAULT_POOL_SIZE))